@@ -1,7 +1,6 @@
 import streamlit as st
 import duckdb
 import pandas as pd
-import time
 from pathlib import Path
 
 DB_PATH = "data/warehouse/retail.duckdb"
@@ -15,26 +14,42 @@ st.title("🚀 RetailOS Live Command Center")
 # ===============================
 @st.cache_resource
 def get_connection():
-    return duckdb.connect(DB_PATH)
+    return duckdb.connect(DB_PATH, read_only=True)
 
 con = get_connection()
 
 # ===============================
 # LIVE METRICS
 # ===============================
+# Results are shared across reruns and viewers for one refresh cycle
+@st.cache_data(ttl=2, show_spinner=False)
 def get_live_metrics():
-    total_orders = con.execute("""
-        SELECT COUNT(*) FROM streaming_orders
-    """).fetchone()[0]
-
-    revenue = con.execute("""
-        SELECT COALESCE(SUM(price * quantity),0)
-        FROM streaming_orders
-        WHERE DATE(timestamp) = CURRENT_DATE
-    """).fetchone()[0]
-
-    return total_orders, revenue
-
+    # One row per day, maintained by the stream on every flush
+    try:
+        return con.execute("""
+            SELECT
+                COALESCE(SUM(orders), 0),
+                COALESCE(SUM(revenue) FILTER (WHERE day = CURRENT_DATE), 0)
+            FROM streaming_stats_rollup
+        """).fetchone()
+    except duckdb.CatalogException:
+        pass
+
+    # Warehouses written before the rollup existed: scan the orders directly
+    try:
+        return con.execute("""
+            SELECT
+                COUNT(*),
+                COALESCE(SUM(price * quantity) FILTER (
+                    WHERE timestamp >= CURRENT_DATE
+                    AND timestamp < CURRENT_DATE + INTERVAL 1 DAY
+                ), 0)
+            FROM streaming_orders
+        """).fetchone()
+    except duckdb.CatalogException:
+        return 0, 0
+
+@st.cache_data(ttl=2, show_spinner=False)
 def get_recent_orders():
     return con.execute("""
         SELECT order_id, product_id, store_id, quantity, price, timestamp
@@ -43,6 +58,7 @@ def get_recent_orders():
         LIMIT 10
     """).fetchdf()
 
+@st.cache_data(ttl=2, show_spinner=False)
 def get_ml_alerts():
     try:
         return con.execute("""
@@ -59,46 +75,49 @@ def get_ml_alerts():
 # DISPLAY SECTION
 # ===============================
 
-total_orders, revenue = get_live_metrics()
+# Only this block re-runs on the refresh timer; the page shell renders once
+@st.fragment(run_every=2)
+def live_block():
+    total_orders, revenue = get_live_metrics()
+
+    col1, col2 = st.columns(2)
 
-col1, col2 = st.columns(2)
+    col1.metric("Total Orders (All Time)", total_orders)
+    col2.metric("Revenue Today (₹)", f"{revenue:,.2f}")
 
-col1.metric("Total Orders (All Time)", total_orders)
-col2.metric("Revenue Today (₹)", f"{revenue:,.2f}")
+    st.divider()
 
-st.divider()
+    st.subheader("📦 Recent Orders")
 
-st.subheader("📦 Recent Orders")
+    recent_orders = get_recent_orders()
 
-recent_orders = get_recent_orders()
+    if recent_orders.empty:
+        st.warning("No streaming orders found.")
+    else:
+        st.dataframe(recent_orders, use_container_width=True)
 
-if recent_orders.empty:
-    st.warning("No streaming orders found.")
-else:
-    st.dataframe(recent_orders, use_container_width=True)
+    st.divider()
 
-st.divider()
+    st.subheader("🚨 ML Stockout Alerts")
 
-st.subheader("🚨 ML Stockout Alerts")
+    alerts = get_ml_alerts()
 
-alerts = get_ml_alerts()
+    if alerts.empty:
+        st.success("No High Risk Stockouts Detected")
+    else:
+        alerts["Confidence"] = (alerts["ml_confidence"] * 100).round(1).astype(str) + "%"
+        alerts = alerts.rename(columns={
+            "product_id": "Product",
+            "store_id": "Store",
+            "risk_level": "Risk Level",
+            "optimal_reorder_qty": "Recommended Reorder"
+        })[["Product", "Store", "Risk Level", "Confidence", "Recommended Reorder"]]
 
-if alerts.empty:
-    st.success("No High Risk Stockouts Detected")
-else:
-    for _, row in alerts.iterrows():
-        st.error(
-            f"""
-            Product: {row['product_id']}  
-            Store: {row['store_id']}  
-            Risk Level: {row['risk_level']}  
-            Confidence: {round(row['ml_confidence'] * 100,1)}%  
-            Recommended Reorder: {row['optimal_reorder_qty']} units
-            """
+        st.dataframe(
+            alerts.style.set_properties(**{"background-color": "#ffcccc"}),
+            use_container_width=True,
+            hide_index=True
         )
 
-# ===============================
-# AUTO REFRESH
-# ===============================
-time.sleep(2)
-st.rerun()
+
+live_block()
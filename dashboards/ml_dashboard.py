@@ -6,7 +6,7 @@ import streamlit as st
 # Add project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.intelligence.ml_predictive_engine import MLPredictiveEngine
+from src.intelligence.ml_predictive_engine import MLPredictiveEngine, RISK_LEVELS
 
 
 st.set_page_config(page_title="ML Stockout Prediction Engine", layout="wide")
@@ -69,33 +69,24 @@ st.subheader("🚨 Scan Entire Inventory for Risk")
 
 if st.button("Scan All Products"):
 
-    df = engine.con.execute("""
-        SELECT DISTINCT dp.product_id, ds.store_id
-        FROM fact_inventory fi
-        JOIN dim_product dp ON fi.product_key = dp.product_key
-        JOIN dim_store ds ON fi.store_key = ds.store_key
-    """).fetchdf()
-
-    results = []
-
-    for _, row in df.iterrows():
-        result = engine.predict_stockout_with_explanation(
-            row["product_id"],
-            row["store_id"]
+    predictions = engine.predict_batch()
+
+    if not predictions.empty:
+        risk_df = pd.DataFrame({
+            "Product": predictions["product_id"],
+            "Store": predictions["store_id"],
+            "Risk": predictions["risk_level"],
+            "Confidence (%)": (predictions["risk_prob"] * 100).round(1),
+            "Recommended Reorder": predictions["recommended_reorder"]
+        })
+
+        # Order by severity rather than alphabetically
+        risk_df["Risk"] = pd.Categorical(
+            risk_df["Risk"],
+            categories=RISK_LEVELS,
+            ordered=True
         )
 
-        if result:
-            results.append({
-                "Product": row["product_id"],
-                "Store": row["store_id"],
-                "Risk": result["explanation"]["risk_level"],
-                "Confidence (%)": round(result["confidence"] * 100, 1),
-                "Recommended Reorder": result["recommended_reorder"]
-            })
-
-    if results:
-        risk_df = pd.DataFrame(results)
-
         # Show highest risk first
         risk_df = risk_df.sort_values(
             by=["Risk", "Confidence (%)"],
@@ -11,6 +11,40 @@ st.title("🛡 Adaptive Schema Governance")
 
 con = duckdb.connect(DB_PATH)
 
+
+def resolve_request(queue_id, action, status):
+    """Mark an approval request and its logged changes as approved/rejected."""
+    con.begin()
+    try:
+        con.execute("""
+        UPDATE schema_approval_queue
+        SET status = ?
+        WHERE queue_id = ?
+        """, [status, queue_id])
+
+        con.execute("""
+        UPDATE schema_change_log
+        SET status = ?,
+            approved_at = CURRENT_TIMESTAMP,
+            approved_by = 'admin'
+        WHERE status = ?
+        """, [status, action])
+
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def load_changes(queue_id, decision_json):
+    """Parse a queued decision once per (queue_id, decision JSON) pair."""
+    decision = json.loads(decision_json)
+    if "changes" in decision:
+        return pd.DataFrame(decision["changes"])
+    return None
+
+
 # =====================================================
 # Pending Approval Requests
 # =====================================================
@@ -21,6 +55,7 @@ SELECT queue_id, table_name, action, reason, decision_json, created_at
 FROM schema_approval_queue
 WHERE status = 'pending'
 ORDER BY created_at DESC
+LIMIT 50
 """).fetchdf()
 
 if pending.empty:
@@ -33,49 +68,22 @@ else:
             st.write("**Reason:**", row["reason"])
             st.write("**Detected At:**", row["created_at"])
 
-            decision = json.loads(row["decision_json"])
+            df_changes = load_changes(row["queue_id"], row["decision_json"])
 
-            if "changes" in decision:
-                df_changes = pd.DataFrame(decision["changes"])
+            if df_changes is not None:
                 st.dataframe(df_changes)
 
             col1, col2 = st.columns(2)
 
             # Approve
             if col1.button(f"✅ Approve {row['queue_id']}"):
-                con.execute("""
-                UPDATE schema_approval_queue
-                SET status = 'approved'
-                WHERE queue_id = ?
-                """, [row["queue_id"]])
-
-                con.execute("""
-                UPDATE schema_change_log
-                SET status = 'approved',
-                    approved_at = CURRENT_TIMESTAMP,
-                    approved_by = 'admin'
-                WHERE status = ?
-                """, [row["action"]])
-
+                resolve_request(row["queue_id"], row["action"], "approved")
                 st.success("Approved successfully.")
                 st.rerun()
 
             # Reject
             if col2.button(f"❌ Reject {row['queue_id']}"):
-                con.execute("""
-                UPDATE schema_approval_queue
-                SET status = 'rejected'
-                WHERE queue_id = ?
-                """, [row["queue_id"]])
-
-                con.execute("""
-                UPDATE schema_change_log
-                SET status = 'rejected',
-                    approved_at = CURRENT_TIMESTAMP,
-                    approved_by = 'admin'
-                WHERE status = ?
-                """, [row["action"]])
-
+                resolve_request(row["queue_id"], row["action"], "rejected")
                 st.warning("Rejected successfully.")
                 st.rerun()
 
@@ -1,110 +1,156 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
 import duckdb
 
-# Single database connection for all functions
-con = duckdb.connect("data/warehouse/retail.duckdb")
+DB_PATH = "data/warehouse/retail.duckdb"
+
+# Single read-only database handle shared by all functions.
+# Revenue, city and customer KPIs read the mv_* summary tables that
+# build_schema.py materializes from fact_sales on every rebuild.
+con = duckdb.connect(DB_PATH, read_only=True)
+
+# Cursor pool bounded to DuckDB's worker threads: concurrent API requests each
+# borrow their own cursor, and any beyond that wait instead of oversubscribing.
+POOL_SIZE = int(con.execute("SELECT current_setting('threads')").fetchone()[0])
+_pool = queue.Queue()
+for _ in range(POOL_SIZE):
+    _pool.put(con.cursor())
+
+# Results of full-table aggregates are reused for CACHE_TTL seconds. This
+# module holds the warehouse open read-only, so a rebuild only shows up once
+# the server reconnects; the TTL just bounds how often the scans rerun.
+CACHE_TTL = 60
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+@contextmanager
+def _cursor():
+    """Borrow a pooled cursor for the duration of one query."""
+    cur = _pool.get()
+    try:
+        yield cur
+    finally:
+        _pool.put(cur)
+
+
+def _records(cur):
+    """Fetch the cursor's result as a list of dicts keyed by column name."""
+    columns = [d[0] for d in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
 
+def _ttl_cached(func):
+    """Cache a KPI result for CACHE_TTL seconds."""
+    @wraps(func)
+    def wrapper():
+        now = time.monotonic()
+
+        with _cache_lock:
+            entry = _cache.get(func.__name__)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        result = func()
+        with _cache_lock:
+            _cache[func.__name__] = (now + CACHE_TTL, result)
+        return result
+
+    return wrapper
+
+
+@_ttl_cached
 def get_daily_revenue():
     """Get daily revenue for the last 30 days"""
-    result = con.execute("""
-        SELECT d.date, SUM(f.revenue) as total_revenue
-        FROM fact_sales f
-        JOIN dim_date d ON f.date_key = d.date_key
-        GROUP BY d.date
-        ORDER BY d.date DESC
-        LIMIT 30
-    """).fetchall()
+    with _cursor() as cur:
+        result = cur.execute("""
+            SELECT date, total_revenue
+            FROM mv_daily_revenue
+            ORDER BY date_key DESC
+            LIMIT 30
+        """).fetchall()
     
     return [{"date": str(r[0]), "revenue": float(r[1])} for r in result]
 
 
+@_ttl_cached
 def get_city_sales():
     """Get city-wise sales performance with detailed metrics"""
-    df = con.execute("""
-        SELECT 
-            ds.city,
-            ds.region,
-            COUNT(DISTINCT fs.store_key) as active_stores,
-            SUM(fs.revenue) as total_revenue,
-            COUNT(fs.sale_id) as transaction_count,
-            AVG(fs.revenue) as avg_transaction_value,
-            SUM(fs.quantity) as total_units_sold,
-            ROUND(SUM(fs.revenue) * 100.0 / SUM(SUM(fs.revenue)) OVER (), 2) as revenue_share_pct
-        FROM fact_sales fs
-        JOIN dim_store ds ON fs.store_key = ds.store_key
-        GROUP BY ds.city, ds.region
-        ORDER BY total_revenue DESC
-    """).fetchdf()
-    
-    return df.to_dict(orient="records")
+    with _cursor() as cur:
+        cur.execute("""
+            SELECT *
+            FROM mv_city_sales
+            ORDER BY total_revenue DESC
+        """)
+        return _records(cur)
 
 
+@_ttl_cached
 def get_customer_distribution():
     """Get customer distribution by city with tier and value segmentation"""
-    df = con.execute("""
-        SELECT 
-            dc.city,
-            CASE 
-                WHEN dc.city IN ('Mumbai', 'Delhi', 'Bangalore') THEN 'Metro'
-                WHEN dc.city IN ('Pune', 'Hyderabad', 'Chennai') THEN 'Tier-1'
-                ELSE 'Tier-2'
-            END as city_tier,
-            COUNT(DISTINCT fs.customer_key) as customer_count,
-            SUM(fs.revenue) as total_revenue,
-            AVG(fs.revenue) as avg_clv,
-            COUNT(fs.sale_id) as total_transactions,
-            AVG(fs.revenue) as avg_transaction_value,
-            (MAX(fs.date_key) - MIN(fs.date_key)) as customer_lifespan_days,
-            CASE 
-                WHEN COUNT(fs.sale_id) = 1 THEN 'One-time'
-                WHEN COUNT(fs.sale_id) <= 5 THEN 'Occasional'
-                WHEN COUNT(fs.sale_id) <= 15 THEN 'Regular'
-                ELSE 'Loyal'
-            END as purchase_frequency_segment,
-            CASE 
-                WHEN SUM(fs.revenue) < 1000 THEN 'Low Value'
-                WHEN SUM(fs.revenue) < 5000 THEN 'Medium Value'
-                WHEN SUM(fs.revenue) < 20000 THEN 'High Value'
-                ELSE 'Premium'
-            END as value_segment
-        FROM fact_sales fs
-        JOIN dim_customer dc ON fs.customer_key = dc.customer_key
-        GROUP BY dc.city
-        ORDER BY total_revenue DESC
-    """).fetchdf()
-    
-    return df.to_dict(orient="records")
+    with _cursor() as cur:
+        cur.execute("""
+            SELECT *
+            FROM mv_customer_distribution
+            ORDER BY total_revenue DESC
+        """)
+        return _records(cur)
 
 
+@_ttl_cached
 def get_stockout_risks():
     """Get inventory movement analysis with stockout risk indicators"""
-    df = con.execute("""
-        SELECT 
-            dp.product_id,
-            dp.name as product_name,
-            dp.category,
-            dp.price,
-            SUM(fs.quantity) as total_sold,
-            SUM(fs.revenue) as total_revenue,
-            COUNT(DISTINCT fs.date_key) as days_sold,
-            MIN(fs.date_key) as first_sale_date,
-            MAX(fs.date_key) as last_sale_date,
-            SUM(fs.quantity) * 1.0 / NULLIF(COUNT(DISTINCT fs.date_key), 0) as avg_daily_sales,
-            (MAX(fs.date_key) - MIN(fs.date_key)) as sales_span_days,
-            CASE 
-                WHEN SUM(fs.quantity) * 1.0 / NULLIF(COUNT(DISTINCT fs.date_key), 0) > 10 THEN 'Fast Moving'
-                WHEN SUM(fs.quantity) * 1.0 / NULLIF(COUNT(DISTINCT fs.date_key), 0) > 2 THEN 'Medium Moving'
-                ELSE 'Slow Moving'
-            END as movement_category,
-            ROUND((SUM(fs.quantity) * 1.0 / NULLIF(COUNT(DISTINCT fs.date_key), 0)) * 30, 2) as projected_monthly_sales,
-            ROUND((SUM(fs.quantity) * 1.0 / NULLIF(COUNT(DISTINCT fs.date_key), 0)) * 365, 2) as projected_annual_sales
-        FROM fact_sales fs
-        JOIN dim_product dp ON fs.product_key = dp.product_key
-        GROUP BY dp.product_id, dp.name, dp.category, dp.price
-        ORDER BY avg_daily_sales DESC
-        LIMIT 20
-    """).fetchdf()
-    
-    return df.to_dict(orient="records")
+    with _cursor() as cur:
+        cur.execute("""
+            WITH base AS (
+                SELECT 
+                    dp.product_id,
+                    dp.name as product_name,
+                    dp.category,
+                    dp.price,
+                    SUM(fs.quantity) as total_sold,
+                    SUM(fs.revenue) as total_revenue,
+                    COUNT(DISTINCT fs.date_key) as days_sold,
+                    MIN(fs.date_key) as first_sale_date,
+                    MAX(fs.date_key) as last_sale_date
+                FROM fact_sales fs
+                JOIN dim_product dp ON fs.product_key = dp.product_key
+                GROUP BY dp.product_id, dp.name, dp.category, dp.price
+            ),
+            rates AS (
+                SELECT 
+                    *,
+                    total_sold * 1.0 / NULLIF(days_sold, 0) as avg_daily_sales
+                FROM base
+            )
+            SELECT 
+                product_id,
+                product_name,
+                category,
+                price,
+                total_sold,
+                total_revenue,
+                days_sold,
+                first_sale_date,
+                last_sale_date,
+                avg_daily_sales,
+                (last_sale_date - first_sale_date) as sales_span_days,
+                CASE 
+                    WHEN avg_daily_sales > 10 THEN 'Fast Moving'
+                    WHEN avg_daily_sales > 2 THEN 'Medium Moving'
+                    ELSE 'Slow Moving'
+                END as movement_category,
+                ROUND(avg_daily_sales * 30, 2) as projected_monthly_sales,
+                ROUND(avg_daily_sales * 365, 2) as projected_annual_sales
+            FROM rates
+            ORDER BY avg_daily_sales DESC
+            LIMIT 20
+        """)
+        return _records(cur)
 
 
 def get_top_product_pairs():
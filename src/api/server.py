@@ -1,4 +1,7 @@
-from fastapi import FastAPI
+import asyncio
+
+import orjson
+from fastapi import APIRouter, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from src.analytics.kpi import (
     get_daily_revenue,
@@ -10,6 +13,19 @@ from src.analytics.kpi import (
 )
 
 app = FastAPI()
+kpi_router = APIRouter()
+
+# Full-table aggregates only change once per ingestion cycle
+CACHE_HEADERS = {"Cache-Control": "public, max-age=60"}
+
+
+def cached_json(data):
+    """Serialize with orjson and attach the KPI cache headers."""
+    return Response(
+        orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json",
+        headers=CACHE_HEADERS,
+    )
 
 # CORS Configuration
 app.add_middleware(
@@ -21,29 +37,36 @@ app.add_middleware(
 )
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
-@app.get("/api/kpi/daily-revenue")
-def daily_revenue():
-    return get_daily_revenue()
+# KPI queries run in worker threads so DuckDB scans do not block the event loop
+@kpi_router.get("/daily-revenue")
+async def daily_revenue():
+    data = await asyncio.to_thread(get_daily_revenue)
+    return cached_json(data)
 
-@app.get("/api/kpi/city-sales")
-def city_sales():
-    return get_city_sales()
+@kpi_router.get("/city-sales")
+async def city_sales():
+    data = await asyncio.to_thread(get_city_sales)
+    return cached_json(data)
 
-@app.get("/api/kpi/customer-distribution")
-def customer_distribution():
-    return get_customer_distribution()
+@kpi_router.get("/customer-distribution")
+async def customer_distribution():
+    data = await asyncio.to_thread(get_customer_distribution)
+    return cached_json(data)
 
-@app.get("/api/kpi/stockout-risks")
-def stockout_risks():
-    return get_stockout_risks()
+@kpi_router.get("/stockout-risks")
+async def stockout_risks():
+    data = await asyncio.to_thread(get_stockout_risks)
+    return cached_json(data)
 
-@app.get("/api/kpi/top-product-pairs")
-def top_product_pairs():
+@kpi_router.get("/top-product-pairs")
+async def top_product_pairs():
     return get_top_product_pairs()
 
-@app.get("/api/kpi/ai-decisions")
-def ai_decisions():
+@kpi_router.get("/ai-decisions")
+async def ai_decisions():
     return get_ai_decisions()
+
+app.include_router(kpi_router, prefix="/api/kpi")
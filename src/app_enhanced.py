@@ -6,10 +6,11 @@ from datetime import datetime, timedelta
 import asyncio
 import json
 import pandas as pd
-import time
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Add parent directory to path to allow importing config
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
@@ -30,9 +31,139 @@ def get_db_connection():
 
 con = get_db_connection()
 
-# Initialize session state for auto-refresh
-if 'last_refresh' not in st.session_state:
-    st.session_state.last_refresh = time.time()
+# Cached query helpers: reruns within the TTL (e.g. auto-refresh or widget
+# clicks) reuse the last result instead of re-running the same query.
+# Display-only results are returned as Arrow tables, which st.dataframe
+# renders without a pandas conversion. Each helper runs on its own cursor so
+# independent queries can be issued from worker threads; the cursor is closed
+# as soon as its result has been fetched.
+@st.cache_data(ttl=5, show_spinner=False)
+def get_last_run():
+    with con.cursor() as cur:
+        return cur.execute("""
+        SELECT start_time, status, rows_processed, duration_seconds
+        FROM pipeline_runs
+        ORDER BY run_id DESC
+        LIMIT 1
+        """).fetchdf()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def get_today_stats():
+    with con.cursor() as cur:
+        return cur.execute("""
+        SELECT 
+            COUNT(*) as orders_today,
+            COALESCE(SUM(price * quantity), 0) as revenue_today,
+            COALESCE(AVG(price * quantity), 0) as avg_order_value,
+            COUNT(DISTINCT customer_id) as unique_customers
+        FROM streaming_orders
+        WHERE DATE(timestamp) = CURRENT_DATE
+        """).fetchdf()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def get_stockout_risks():
+    with con.cursor() as cur:
+        return cur.execute("""
+        SELECT 
+            ml.store_id,
+            ml.product_id,
+            dp.name as product_name,
+            ds.store_name,
+            ml.current_stock,
+            ml.prophet_7d_forecast,
+            ml.days_remaining_forecast,
+            ml.risk_level,
+            ml.ml_confidence,
+            ml.optimal_reorder_qty
+        FROM (
+            -- Latest prediction per store/product
+            SELECT * FROM ml_reasoning_log
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY store_id, product_id ORDER BY timestamp DESC
+            ) = 1
+        ) ml
+        JOIN dim_product dp ON ml.product_id = dp.product_id
+        JOIN dim_store ds ON ml.store_id = ds.store_id
+        WHERE ml.risk_level >= 2  -- High or Critical
+        ORDER BY ml.days_remaining_forecast ASC
+        LIMIT 20
+        """).fetchdf()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def get_recent_orders():
+    with con.cursor() as cur:
+        return cur.execute("""
+        SELECT order_id, timestamp, product_id, quantity, price, payment_method, order_source 
+        FROM streaming_orders 
+        ORDER BY timestamp DESC 
+        LIMIT 10
+        """).to_arrow_table()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def get_recent_predictions():
+    with con.cursor() as cur:
+        return cur.execute("""
+        SELECT 
+            timestamp,
+            store_id,
+            product_id,
+            risk_level,
+            ml_confidence
+        FROM ml_reasoning_log
+        ORDER BY timestamp DESC
+        LIMIT 50
+        """).fetchdf()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def get_prediction(selected_ts):
+    with con.cursor() as cur:
+        return cur.execute("""
+        SELECT * FROM ml_reasoning_log
+        WHERE timestamp = ?
+        LIMIT 1
+        """, [selected_ts]).fetchdf()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def get_schema_summary():
+    with con.cursor() as cur:
+        return cur.execute("""
+        SELECT 
+            COUNT(*),
+            COUNT(*) FILTER (WHERE status = 'pending'),
+            COUNT(*) FILTER (WHERE status = 'auto_approved')
+        FROM schema_change_log
+        """).fetchone()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def get_schema_changes():
+    with con.cursor() as cur:
+        return cur.execute("""
+        SELECT 
+            detected_at,
+            table_name,
+            change_type,
+            column_name,
+            confidence_score,
+            status
+        FROM schema_change_log
+        ORDER BY detected_at DESC
+        LIMIT 20
+        """).to_arrow_table()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def get_pipeline_runs():
+    with con.cursor() as cur:
+        return cur.execute("""
+        SELECT 
+            start_time,
+            status,
+            rows_processed,
+            rows_quarantined,
+            duration_seconds
+        FROM pipeline_runs
+        ORDER BY run_id DESC
+        LIMIT 50
+        """).fetchdf()
 
 st.title("🏪 RetailOS Intelligence Platform")
 
@@ -43,12 +174,7 @@ with st.sidebar:
     if con:
         # Pipeline status
         try:
-            last_run = con.execute("""
-            SELECT start_time, status, rows_processed, duration_seconds
-            FROM pipeline_runs
-            ORDER BY run_id DESC
-            LIMIT 1
-            """).fetchdf()
+            last_run = get_last_run()
             
             if not last_run.empty:
                 status_emoji = "✅" if last_run.iloc[0]['status'] == 'success' else "❌"
@@ -86,23 +212,21 @@ if not con:
     st.stop()
 
 ## TAB 1: LIVE INTELLIGENCE
-with tab1:
+# Only this fragment re-runs on auto-refresh; the other tabs stay as rendered
+@st.fragment(run_every=5 if auto_refresh else None)
+def live_block():
+    # The three Tab 1 queries are independent, so run them concurrently
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=3, initializer=add_script_run_ctx, initargs=(None, ctx)) as pool:
+        today_future = pool.submit(get_today_stats)
+        risks_future = pool.submit(get_stockout_risks)
+        recent_future = pool.submit(get_recent_orders)
+    
     col1, col2, col3, col4 = st.columns(4)
     
     try:
-        # Check if streaming_orders exists
-        con.execute("SELECT 1 FROM streaming_orders LIMIT 1")
-        
-        # Real-time metrics
-        today_stats = con.execute("""
-        SELECT 
-            COUNT(*) as orders_today,
-            COALESCE(SUM(price * quantity), 0) as revenue_today,
-            COALESCE(AVG(price * quantity), 0) as avg_order_value,
-            COUNT(DISTINCT customer_id) as unique_customers
-        FROM streaming_orders
-        WHERE DATE(timestamp) = CURRENT_DATE
-        """).fetchdf().iloc[0]
+        # Real-time metrics (raises if streaming_orders does not exist yet)
+        today_stats = today_future.result().iloc[0]
         
         col1.metric("Orders Today", f"{today_stats['orders_today']:,}")
         col2.metric("Revenue Today", f"₹{today_stats['revenue_today']:,.0f}")
@@ -117,40 +241,34 @@ with tab1:
     st.subheader("🚨 ML-Predicted Stockout Risks")
     
     try:
-        risks = con.execute("""
-        SELECT 
-            ml.store_id,
-            ml.product_id,
-            dp.name as product_name,
-            ds.store_name,
-            ml.current_stock,
-            ml.prophet_7d_forecast,
-            ml.days_remaining_forecast,
-            ml.risk_level,
-            ml.ml_confidence,
-            ml.optimal_reorder_qty
-        FROM ml_reasoning_log ml
-        JOIN dim_product dp ON ml.product_id = dp.product_id
-        JOIN dim_store ds ON ml.store_id = ds.store_id
-        WHERE ml.risk_level >= 2  -- High or Critical
-        AND ml.timestamp = (
-            SELECT MAX(timestamp) FROM ml_reasoning_log ml2
-            WHERE ml2.store_id = ml.store_id AND ml2.product_id = ml.product_id
-        )
-        ORDER BY ml.days_remaining_forecast ASC
-        LIMIT 20
-        """).fetchdf()
+        risks = risks_future.result()
         
         if not risks.empty:
-            for _, row in risks.iterrows():
-                with st.container(border=True):
-                    c1, c2, c3, c4, c5 = st.columns([2, 2, 1, 1, 1])
-                    c1.write(f"**{row['store_name']}**")
-                    c2.write(row['product_name'])
-                    c3.metric("Stock", f"{row['current_stock']:.0f}")
-                    c4.metric("Days", f"{row['days_remaining_forecast']:.1f}", 
-                               delta=f"{row['ml_confidence']:.0%} conf", delta_color="inverse")
-                    c5.button("Reorder", key=f"ro_{row['store_id']}_{row['product_id']}")
+            # One table widget instead of a container per risk row
+            st.dataframe(
+                risks.assign(ml_confidence=risks['ml_confidence'] * 100),
+                column_order=['store_name', 'product_name', 'current_stock',
+                              'days_remaining_forecast', 'ml_confidence'],
+                column_config={
+                    'store_name': "Store",
+                    'product_name': "Product",
+                    'current_stock': st.column_config.NumberColumn("Stock", format="%.0f"),
+                    'days_remaining_forecast': st.column_config.NumberColumn("Days", format="%.1f"),
+                    'ml_confidence': st.column_config.ProgressColumn(
+                        "Confidence", format="%.0f%%", min_value=0, max_value=100
+                    ),
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            c1, c2 = st.columns([4, 1])
+            to_reorder = c1.selectbox(
+                "Reorder which?",
+                risks.index,
+                format_func=lambda i: f"{risks.at[i, 'store_name']} | {risks.at[i, 'product_name']}"
+            )
+            c2.button("Reorder", key=f"ro_{risks.at[to_reorder, 'store_id']}_{risks.at[to_reorder, 'product_id']}")
         else:
             st.success("✅ No high-risk stockouts predicted")
     except Exception as e:
@@ -159,53 +277,42 @@ with tab1:
     # Live order feed
     st.subheader("🔴 Recent Orders")
     try:
-        recent = con.execute("""
-        SELECT order_id, timestamp, product_id, quantity, price, payment_method, order_source 
-        FROM streaming_orders 
-        ORDER BY timestamp DESC 
-        LIMIT 10
-        """).fetchdf()
+        recent = recent_future.result()
         st.dataframe(recent, use_container_width=True, hide_index=True)
     except:
         pass
 
+with tab1:
+    live_block()
+
 ## TAB 2: ML REASONING EXPLORER
 with tab2:
     st.header("🤖 ML Model Reasoning Explorer")
     
     try:
         # Select a recent prediction
-        recent_predictions = con.execute("""
-        SELECT 
-            timestamp,
-            store_id,
-            product_id,
-            risk_level,
-            ml_confidence
-        FROM ml_reasoning_log
-        ORDER BY timestamp DESC
-        LIMIT 50
-        """).fetchdf()
+        recent_predictions = get_recent_predictions()
         
         if not recent_predictions.empty:
+            # Display only; get_prediction() is keyed on the typed timestamp
+            def prediction_label(i):
+                ts, store, product, risk = (
+                    None if pd.isna(v) else v
+                    for v in recent_predictions.loc[i, ['timestamp', 'store_id', 'product_id', 'risk_level']]
+                )
+                return f"{ts} | Store {store} | Product {product} | Risk: {risk}"
+
             selected = st.selectbox(
                 "Select a prediction to examine:",
-                recent_predictions.apply(
-                    lambda x: f"{x['timestamp']} | Store {x['store_id']} | Product {x['product_id']} | Risk: {x['risk_level']}", 
-                    axis=1
-                )
+                recent_predictions.index,
+                format_func=prediction_label
             )
             
-            if selected:
-                # Parse selection to find row
-                selected_ts = selected.split('|')[0].strip()
+            if selected is not None:
+                selected_ts = recent_predictions.at[selected, 'timestamp']
                 
                 # Get full explanation
-                full = con.execute(f"""
-                SELECT * FROM ml_reasoning_log
-                WHERE CAST(timestamp AS VARCHAR) = '{selected_ts}'
-                LIMIT 1
-                """).fetchdf()
+                full = get_prediction(selected_ts)
                 
                 if not full.empty:
                     row = full.iloc[0]
@@ -256,9 +363,7 @@ with tab3:
         # Summary stats
         c1, c2, c3 = st.columns(3)
         
-        total_changes = con.execute("SELECT COUNT(*) FROM schema_change_log").fetchone()[0]
-        pending = con.execute("SELECT COUNT(*) FROM schema_change_log WHERE status = 'pending'").fetchone()[0]
-        auto_approved = con.execute("SELECT COUNT(*) FROM schema_change_log WHERE status = 'auto_approved'").fetchone()[0]
+        total_changes, pending, auto_approved = get_schema_summary()
         
         c1.metric("Total Schema Changes", total_changes)
         c2.metric("Pending Approval", pending)
@@ -267,18 +372,7 @@ with tab3:
         # Recent changes
         st.subheader("Recent Schema Changes")
         
-        changes = con.execute("""
-        SELECT 
-            detected_at,
-            table_name,
-            change_type,
-            column_name,
-            confidence_score,
-            status
-        FROM schema_change_log
-        ORDER BY detected_at DESC
-        LIMIT 20
-        """).fetchdf()
+        changes = get_schema_changes()
         
         st.dataframe(changes, use_container_width=True)
         
@@ -291,17 +385,7 @@ with tab4:
     
     try:
         # Run history
-        runs = con.execute("""
-        SELECT 
-            start_time,
-            status,
-            rows_processed,
-            rows_quarantined,
-            duration_seconds
-        FROM pipeline_runs
-        ORDER BY run_id DESC
-        LIMIT 50
-        """).fetchdf()
+        runs = get_pipeline_runs()
         
         if not runs.empty:
             # Success rate
@@ -322,9 +406,4 @@ with tab4:
 with tab5:
     st.header("⚠️ Order/Schema Approval Queue")
     # Placeholder for approval queue logic
-    st.info("Approval queue is currently empty.")
-
-# Auto-refresh handling
-if auto_refresh:
-    time.sleep(5)
-    st.rerun()
\ No newline at end of file
+    st.info("Approval queue is currently empty.")
\ No newline at end of file
@@ -1,12 +1,14 @@
 import streamlit as st
 import asyncio
 import websockets
-import json
+import orjson
+from collections import deque
 from datetime import datetime
+from itertools import islice
 
 # WebSocket connection state
 if 'ws_orders' not in st.session_state:
-    st.session_state.ws_orders = []
+    st.session_state.ws_orders = deque(maxlen=50)  # Keep last 50
 if 'ws_stats' not in st.session_state:
     st.session_state.ws_stats = {}
 
@@ -16,20 +18,19 @@ async def connect_websocket():
     
     async with websockets.connect(uri) as websocket:
         # Send initial stats request
-        await websocket.send(json.dumps({'action': 'get_stats'}))
+        await websocket.send(orjson.dumps({'action': 'get_stats'}).decode())
         
         while True:
             try:
                 message = await asyncio.wait_for(websocket.recv(), timeout=1.0)
-                data = json.loads(message)
+                data = orjson.loads(message)
                 
                 if data['type'] == 'initial_state':
-                    st.session_state.ws_orders = data['orders']
+                    st.session_state.ws_orders = deque(data['orders'], maxlen=50)
                     st.session_state.ws_stats['total_today'] = data['total_today']
                 
                 elif 'order_id' in data:  # New order
-                    st.session_state.ws_orders.insert(0, data)
-                    st.session_state.ws_orders = st.session_state.ws_orders[:50]  # Keep last 50
+                    st.session_state.ws_orders.appendleft(data)
                 
                 elif data['type'] == 'stats_update':
                     st.session_state.ws_stats = data['stats']
@@ -66,7 +67,7 @@ with col4:
 
 # Live order feed
 st.subheader("Latest Orders")
-for order in st.session_state.ws_orders[:10]:
+for order in islice(st.session_state.ws_orders, 10):
     with st.container():
         col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
         col1.write(f"**Order #{order['order_id']}**")
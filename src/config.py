@@ -6,6 +6,7 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / 'data'
 WAREHOUSE_DIR = DATA_DIR / 'warehouse'
+QUARANTINE_DIR = DATA_DIR / 'quarantine'
 MODELS_DIR = BASE_DIR / 'models'
 LOGS_DIR = BASE_DIR / 'logs'
 
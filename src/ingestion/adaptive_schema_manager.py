@@ -1,12 +1,12 @@
-import pandas as pd
 import duckdb
-import json
+import orjson
 import os
 import sys
-from collections import defaultdict
 
 # Add parent directory for config
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+_SRC_DIR = os.path.dirname(os.path.dirname(__file__))
+if _SRC_DIR not in sys.path:
+    sys.path.append(_SRC_DIR)
 
 try:
     from config import DB_PATH
@@ -26,7 +26,7 @@ class AdaptiveSchemaManager:
     # =====================================================
     def initialize_registry(self):
 
-        self.schema_registry = {
+        defaults = {
             "transactions": {
                 "version": 1,
                 "required": [
@@ -68,10 +68,21 @@ class AdaptiveSchemaManager:
             approved_at TIMESTAMP,
             approved_by VARCHAR,
             affected_rows INTEGER,
-            sample_data VARCHAR
+            sample_data VARCHAR[]
         )
         """)
 
+        # Older warehouses stored sample_data as JSON-encoded text
+        sample_type = self.con.execute("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'schema_change_log' AND column_name = 'sample_data'
+        """).fetchone()
+        if sample_type and sample_type[0] == "VARCHAR":
+            self.con.execute("""
+            ALTER TABLE schema_change_log ALTER sample_data TYPE VARCHAR[]
+            USING CAST(CAST(sample_data AS JSON) AS VARCHAR[])
+            """)
+
         self.con.execute("""
         CREATE TABLE IF NOT EXISTS schema_approval_queue (
             queue_id INTEGER DEFAULT nextval('schema_queue_seq') PRIMARY KEY,
@@ -84,6 +95,72 @@ class AdaptiveSchemaManager:
         )
         """)
 
+        # Registry is persisted so every worker starts from the same schema
+        self.con.execute("""
+        CREATE TABLE IF NOT EXISTS schema_registry (
+            table_name VARCHAR,
+            column_name VARCHAR,
+            col_type VARCHAR,
+            is_required BOOLEAN,
+            version INTEGER,
+            PRIMARY KEY (table_name, column_name)
+        )
+        """)
+
+        # In-code defaults win over older stored entries, so edits to them
+        # reach existing warehouses; entries at a newer version are kept
+        self.con.executemany("""
+        INSERT INTO schema_registry VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (table_name, column_name) DO UPDATE SET
+            col_type = EXCLUDED.col_type,
+            is_required = EXCLUDED.is_required,
+            version = EXCLUDED.version
+        WHERE EXCLUDED.version >= schema_registry.version
+        """, [
+            [
+                table_name,
+                col,
+                schema["types"].get(col),
+                col in schema["required"],
+                schema["version"],
+            ]
+            for table_name, schema in defaults.items()
+            for col in schema["required"] + schema["optional"]
+        ])
+
+        self.schema_registry = self._load_registry()
+
+    def _load_registry(self):
+
+        registry = {}
+        rows = self.con.execute("""
+        SELECT table_name, column_name, col_type, is_required, version
+        FROM schema_registry
+        ORDER BY table_name, rowid
+        """).fetchall()
+
+        for table_name, col, col_type, is_required, version in rows:
+            schema = registry.setdefault(table_name, {
+                "version": version,
+                "required": [],
+                "optional": [],
+                "types": {},
+            })
+            schema["version"] = max(schema["version"], version)
+            schema["required" if is_required else "optional"].append(col)
+            if col_type is not None:
+                schema["types"][col] = col_type
+
+        for schema in registry.values():
+            self._index_schema(schema)
+
+        return registry
+
+    def _index_schema(self, schema):
+        # Column sets used on every ingest; rebuild whenever required/optional change
+        schema["_required_set"] = frozenset(schema["required"])
+        schema["_expected_set"] = frozenset(schema["required"] + schema["optional"])
+
     # =====================================================
     # CHANGE DETECTION
     # =====================================================
@@ -94,45 +171,84 @@ class AdaptiveSchemaManager:
             return [], []
 
         incoming_cols = set(df.columns)
-        expected_cols = set(schema["required"] + schema["optional"])
 
-        new_cols = incoming_cols - expected_cols
-        missing_required = set(schema["required"]) - incoming_cols
+        # Steady state: the batch carries exactly the registered columns
+        if incoming_cols == schema["_expected_set"]:
+            return [], []
+
+        new_cols = incoming_cols - schema["_expected_set"]
+        missing_required = {c for c in schema["_required_set"] if c not in incoming_cols}
 
         changes = []
 
+        null_counts, unique_counts = self._column_stats(df, list(new_cols))
+        n = len(df)
+        dtypes = df.dtypes
+
         for col in new_cols:
-            confidence = self._calculate_confidence(df[col])
+            dtype = dtypes[col]
+            confidence = self._calculate_confidence(
+                null_counts[col], unique_counts[col], n, dtype
+            )
             changes.append({
                 "type": "new_column",
                 "column": col,
                 "confidence": confidence,
-                "data_type": str(df[col].dtype),
-                "sample_values": df[col].dropna().astype(str).head(5).tolist()
+                "data_type": str(dtype),
+                "sample_values": self._sample_values(df[col])
             })
 
         return changes, missing_required
 
+    def _column_stats(self, df, cols):
+        # Null and distinct counts for every new column in a single DuckDB scan
+        if not cols:
+            return {}, {}
+
+        exprs = []
+        for col in cols:
+            quoted = '"' + str(col).replace('"', '""') + '"'
+            exprs.append(f"COUNT(*) - COUNT({quoted})")
+            exprs.append(f"COUNT(DISTINCT {quoted})")
+
+        self.con.register("incoming_df", df[cols])
+        try:
+            row = self.con.execute(
+                f"SELECT {', '.join(exprs)} FROM incoming_df"
+            ).fetchone()
+        finally:
+            self.con.unregister("incoming_df")
+
+        return dict(zip(cols, row[0::2])), dict(zip(cols, row[1::2]))
+
+    def _sample_values(self, series, k=5):
+        # Look for non-null values in a short prefix before scanning the whole column
+        head = series.iloc[:100]
+        sample = head[head.notna()]
+        if len(sample) < k and len(series) > len(head):
+            sample = series[series.notna()]
+        return sample.head(k).astype(str).tolist()
+
     # =====================================================
     # CONFIDENCE
     # =====================================================
-    def _calculate_confidence(self, series):
+    def _calculate_confidence(self, null_count, unique_count, n, dtype):
 
-        if len(series) == 0:
+        if n == 0:
             return 0.0
 
         confidence = 0.0
 
-        null_ratio = series.isnull().mean()
+        null_ratio = null_count / n
         confidence += (1 - null_ratio) * 0.3
 
-        unique_ratio = series.nunique() / len(series)
+        unique_ratio = unique_count / n
         if 0.01 < unique_ratio < 0.99:
             confidence += 0.3
         else:
             confidence += 0.1
 
-        if series.dtype != "object":
+        if dtype != "object":
             confidence += 0.4
         else:
             confidence += 0.2
@@ -147,17 +263,18 @@ class AdaptiveSchemaManager:
         if not changes:
             return {"action": "none", "changes": []}
 
-        high = [c for c in changes if c["confidence"] >= self.confidence_threshold]
-        low = [c for c in changes if c["confidence"] < self.confidence_threshold]
-
-        if len(low) > 5:
-            return {
-                "action": "quarantine_all",
-                "reason": "Mass low-confidence changes",
-                "changes": changes,
-            }
-
-        if len(high) == len(changes) and len(changes) <= 3:
+        low = 0
+        for c in changes:
+            if c["confidence"] < self.confidence_threshold:
+                low += 1
+                if low > 5:
+                    return {
+                        "action": "quarantine_all",
+                        "reason": "Mass low-confidence changes",
+                        "changes": changes,
+                    }
+
+        if low == 0 and len(changes) <= 3:
             return {
                 "action": "auto_approve",
                 "changes": changes,
@@ -177,24 +294,8 @@ class AdaptiveSchemaManager:
         if "changes" not in decision:
             return
 
-        for change in decision["changes"]:
-            self.con.execute("""
-            INSERT INTO schema_change_log (
-                table_name,
-                change_type,
-                column_name,
-                old_value,
-                new_value,
-                confidence_score,
-                status,
-                detected_at,
-                approved_at,
-                approved_by,
-                affected_rows,
-                sample_data
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, NULL, NULL, 0, ?)
-            """, [
+        rows = [
+            [
                 table_name,
                 change["type"],
                 change["column"],
@@ -202,8 +303,32 @@ class AdaptiveSchemaManager:
                 change["data_type"],
                 change["confidence"],
                 decision["action"],
-                json.dumps(change["sample_values"]),
-            ])
+                change["sample_values"],
+            ]
+            for change in decision["changes"]
+        ]
+
+        if not rows:
+            return
+
+        # One prepared statement for the whole batch
+        self.con.executemany("""
+        INSERT INTO schema_change_log (
+            table_name,
+            change_type,
+            column_name,
+            old_value,
+            new_value,
+            confidence_score,
+            status,
+            detected_at,
+            approved_at,
+            approved_by,
+            affected_rows,
+            sample_data
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, NULL, NULL, 0, ?)
+        """, rows)
 
     def _create_approval_request(self, table_name, decision):
 
@@ -221,7 +346,9 @@ class AdaptiveSchemaManager:
             table_name,
             decision["action"],
             decision.get("reason", ""),
-            json.dumps(decision, default=str),
+            orjson.dumps(
+                decision, default=str, option=orjson.OPT_SERIALIZE_NUMPY
+            ).decode(),
         ])
 
     # =====================================================
@@ -243,13 +370,22 @@ class AdaptiveSchemaManager:
 
         decision = self.apply_noise_reduction_strategy(changes)
 
-        self.log_pending_change(table_name, decision)
+        # Change log and approval request commit together
+        self.con.begin()
+        try:
+            self.log_pending_change(table_name, decision)
+
+            if decision["action"] != "auto_approve":
+                self._create_approval_request(table_name, decision)
+
+            self.con.commit()
+        except Exception:
+            self.con.rollback()
+            raise
 
         if decision["action"] == "auto_approve":
             return {"status": "approved", "action": "process"}
 
-        self._create_approval_request(table_name, decision)
-
         return {
             "status": "pending_approval",
             "action": "hold",
@@ -1,11 +1,18 @@
 import logging
+import os
 import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Deque, Dict, FrozenSet, List, Optional, Set, Tuple
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import csv as pa_csv
 
 
 logger = logging.getLogger(__name__)
@@ -15,6 +22,14 @@ logging.basicConfig(
 )
 
 
+# Tokens pandas.read_csv treats as missing by default
+CSV_NULL_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+]
+
+
 @dataclass
 class TableSchema:
     """Schema definition for a logical table."""
@@ -22,11 +37,28 @@ class TableSchema:
     name: str
     required_columns: List[str]
     optional_columns: List[str] = field(default_factory=list)
+    # Arrow type aliases (e.g. "string", "int64") pinned when parsing CSVs
+    column_types: Dict[str, str] = field(default_factory=dict)
+    # Inclusive (low, high) bounds; rows outside them are quarantined
+    numeric_ranges: Dict[str, Tuple[float, float]] = field(default_factory=dict)
 
     @property
     def all_known_columns(self) -> List[str]:
         return self.required_columns + self.optional_columns
 
+    # Column sets used by validation on every chunk; computed once per schema
+    @cached_property
+    def required_set(self) -> FrozenSet[str]:
+        return frozenset(self.required_columns)
+
+    @cached_property
+    def known_set(self) -> FrozenSet[str]:
+        return frozenset(self.all_known_columns)
+
+    @cached_property
+    def required_sorted(self) -> Tuple[str, ...]:
+        return tuple(sorted(self.required_set))
+
 
 class SchemaRegistry:
     """Very simple in-memory schema registry."""
@@ -45,12 +77,15 @@ class IngestionConfig:
     output_dir: Path = Path("data/raw")  # Parquet output (can be different if desired)
     max_retries: int = 3
     base_backoff_seconds: float = 1.0  # exponential backoff base
+    chunk_rows: int = 200_000  # rows per Parquet batch; CSVs are read in 64 MiB blocks
+    parquet_compression: str = "zstd"
+    parquet_row_group: int = 256_000
 
 
 class BatchIngestionPipeline:
     """
     Batch ingestion pipeline that:
-    - Reads CSV files from data/raw/
+    - Reads CSV / Parquet files from data/raw/ in bounded chunks
     - Validates schema against a registry
     - Handles schema evolution (new columns = log drift, missing required = quarantine)
     - Auto-retries on read failures
@@ -69,81 +104,206 @@ class BatchIngestionPipeline:
     # Public API
     # -----------------------------
 
-    def run_for_table(self, table_name: str, csv_filename: str) -> None:
+    def run_all(self) -> Dict[str, int]:
         """
-        Run ingestion for a single logical table / csv file.
+        Run ingestion for every file in RAW_TABLES, one after another.
+
+        Returns
+        -------
+        dict
+            'total_rows' read across all tables and how many of them were
+            'quarantined_rows'.
+        """
+        total_rows = quarantined_rows = 0
+        for table_name, filename in RAW_TABLES:
+            valid, quarantined = self.run_for_table(table_name, filename)
+            total_rows += valid + quarantined
+            quarantined_rows += quarantined
+        return {"total_rows": total_rows, "quarantined_rows": quarantined_rows}
+
+    def run_for_table(self, table_name: str, filename: str) -> Tuple[int, int]:
+        """
+        Run ingestion for a single logical table / raw file.
 
         Parameters
         ----------
         table_name : str
             Logical name used to look up schema.
-        csv_filename : str
-            File name under raw_dir, e.g. 'customers.csv'.
+        filename : str
+            File name under raw_dir, e.g. 'customers.csv' or 'transactions.parquet'.
+
+        Returns
+        -------
+        tuple of int
+            (valid_rows, quarantined_rows); both 0 if the file could not be read.
         """
-        logger.info("Starting ingestion for table=%s, file=%s", table_name, csv_filename)
+        logger.info("Starting ingestion for table=%s, file=%s", table_name, filename)
         schema = self.schema_registry.get(table_name)
         if not schema:
             raise ValueError(f"No schema registered for table '{table_name}'")
 
-        csv_path = self.config.raw_dir / csv_filename
-
-        df = self._read_with_retries(csv_path)
-        if df is None:
-            logger.error("Failed to read file after retries: %s", csv_path)
-            return
+        path = self.config.raw_dir / filename
 
-        logger.info("Read CSV '%s' with %d rows and %d columns", csv_path, len(df), len(df.columns))
-
-        valid_df, quarantine_df = self._validate_and_split(df, schema)
-
-        if not quarantine_df.empty:
-            self._write_quarantine(table_name, quarantine_df)
-
-        if not valid_df.empty:
-            self._write_parquet(table_name, valid_df)
-
-        logger.info(
-            "Completed ingestion for table=%s: valid_rows=%d, quarantined_rows=%d",
-            table_name,
-            len(valid_df),
-            len(quarantine_df),
-        )
-
-    # -----------------------------
-    # Internal helpers
-    # -----------------------------
-
-    def _read_with_retries(self, path: Path) -> Optional[pd.DataFrame]:
+        # A failure part-way through the file (e.g. in a later CSV block or
+        # row group) retries the whole file; partial outputs are discarded
         attempt = 0
         while attempt < self.config.max_retries:
             try:
-                logger.info("Reading CSV (attempt %d/%d): %s", attempt + 1, self.config.max_retries, path)
-                df = pd.read_csv(path)
-                return df
+                logger.info("Reading file (attempt %d/%d): %s", attempt + 1, self.config.max_retries, path)
+                valid_rows, quarantined_rows = self._ingest_file(table_name, path, schema)
+                break
             except Exception as exc:  # noqa: BLE001
                 attempt += 1
-                logger.warning("Failed to read CSV '%s' on attempt %d: %s", path, attempt, exc)
+                logger.warning("Failed to read file '%s' on attempt %d: %s", path, attempt, exc)
                 if attempt >= self.config.max_retries:
-                    break
+                    logger.error("Failed to read file after retries: %s", path)
+                    return 0, 0
                 backoff = self.config.base_backoff_seconds * (2 ** (attempt - 1))
                 logger.info("Backing off for %.2f seconds before retry", backoff)
                 time.sleep(backoff)
-        return None
 
-    def _validate_and_split(self, df: pd.DataFrame, schema: TableSchema) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        """
-        Validate dataframe against schema and split into valid and quarantined records.
+        logger.info(
+            "Completed ingestion for table=%s: valid_rows=%d, quarantined_rows=%d",
+            table_name,
+            valid_rows,
+            quarantined_rows,
+        )
+        return valid_rows, quarantined_rows
 
-        - Rows missing any required column values => quarantine with reason.
-        - Extra columns (unknown) => logged as schema drift but kept.
-        """
-        incoming_cols = set(df.columns.tolist())
-        required = set(schema.required_columns)
-        optional = set(schema.optional_columns)
-        known = required | optional
+    # -----------------------------
+    # Internal helpers
+    # -----------------------------
+
+    def _ingest_file(self, table_name: str, path: Path, schema: TableSchema) -> Tuple[int, int]:
+        """Stream one raw file into Parquet outputs; raises on any read or write error."""
+        reader = self._open_reader(path, schema.column_types)
+
+        # Stream the file chunk by chunk so peak memory is bounded by one chunk
+        run_time = datetime.now(timezone.utc)
+        ts = run_time.strftime("%Y%m%dT%H%M%S")
+        parquet_path = self.config.output_dir / f"{table_name}_{ts}.parquet"
+        quarantine_path = self.config.quarantine_dir / f"{table_name}_quarantine_{ts}.parquet"
+        # Written under a temporary name and only moved into place once the
+        # whole file has been read, so a failed run leaves no truncated output
+        tmp_paths = {
+            parquet_path: parquet_path.with_name(parquet_path.name + ".tmp"),
+            quarantine_path: quarantine_path.with_name(quarantine_path.name + ".tmp"),
+        }
+        quarantine_schema = reader.schema.append(pa.field("quarantine_reason", pa.string())).append(
+            pa.field("quarantined_at", pa.timestamp("us", tz="UTC"))
+        )
+        writer: Optional[pq.ParquetWriter] = None
+        quarantine_writer: Optional[pq.ParquetWriter] = None
+        valid_rows = quarantined_rows = 0
+        validate = bool(schema.required_set or schema.numeric_ranges)
+
+        # Parquet writes run on one background thread (preserving write order)
+        # so the next chunk is converted and validated while the last one is
+        # flushed. At most two writes are in flight at a time.
+        pending: Deque[Future] = deque()
+
+        def submit_write(target: pq.ParquetWriter, table: pa.Table, **kwargs) -> None:
+            pending.append(write_pool.submit(target.write_table, table, **kwargs))
+            while len(pending) > 2:
+                pending.popleft().result()
+
+        try:
+            with ThreadPoolExecutor(max_workers=1) as write_pool:
+                for batch in reader:
+                    logger.info(
+                        "Read chunk from '%s' with %d rows and %d columns", path, batch.num_rows, batch.num_columns
+                    )
 
-        missing_required_cols = required - incoming_cols
-        new_cols = incoming_cols - known
+                    if not validate:
+                        # Nothing can be quarantined, so the batch goes to the
+                        # writer as read, without a round trip through pandas
+                        self._log_column_changes(batch.schema.names, schema)
+                        if batch.num_rows:
+                            if writer is None:
+                                logger.info("Writing valid rows for table='%s' to Parquet '%s'", table_name, parquet_path)
+                                writer = self._open_parquet_writer(tmp_paths[parquet_path], reader.schema)
+                            submit_write(
+                                writer,
+                                pa.Table.from_batches([batch]),
+                                row_group_size=self.config.parquet_row_group,
+                            )
+                            valid_rows += batch.num_rows
+                        continue
+
+                    valid_df, quarantine_df = self._validate_and_split(batch.to_pandas(split_blocks=True), schema)
+
+                    if not quarantine_df.empty:
+                        if quarantine_writer is None:
+                            logger.info("Writing quarantined rows for table='%s' to '%s'", table_name, quarantine_path)
+                            quarantine_writer = self._open_parquet_writer(tmp_paths[quarantine_path], quarantine_schema)
+                        submit_write(
+                            quarantine_writer,
+                            pa.Table.from_pandas(
+                                quarantine_df.assign(quarantined_at=run_time),
+                                schema=quarantine_schema,
+                                preserve_index=False,
+                            ),
+                        )
+                        quarantined_rows += len(quarantine_df)
+
+                    if not valid_df.empty:
+                        if writer is None:
+                            logger.info("Writing valid rows for table='%s' to Parquet '%s'", table_name, parquet_path)
+                            writer = self._open_parquet_writer(tmp_paths[parquet_path], reader.schema)
+                        submit_write(
+                            writer,
+                            pa.Table.from_pandas(valid_df, schema=reader.schema, preserve_index=False),
+                            row_group_size=self.config.parquet_row_group,
+                        )
+                        valid_rows += len(valid_df)
+
+                while pending:
+                    pending.popleft().result()
+        except BaseException:
+            for open_writer in (writer, quarantine_writer):
+                if open_writer is not None:
+                    open_writer.close()
+            for tmp_path in tmp_paths.values():
+                tmp_path.unlink(missing_ok=True)
+            raise
+
+        for final_path, open_writer in ((parquet_path, writer), (quarantine_path, quarantine_writer)):
+            if open_writer is not None:
+                open_writer.close()
+                os.replace(tmp_paths[final_path], final_path)
+
+        return valid_rows, quarantined_rows
+
+    def _open_reader(self, path: Path, column_types: Optional[Dict[str, str]] = None) -> pa.RecordBatchReader:
+        if path.suffix == ".parquet":
+            parquet_file = pq.ParquetFile(path)
+            return pa.RecordBatchReader.from_batches(
+                parquet_file.schema_arrow,
+                parquet_file.iter_batches(batch_size=self.config.chunk_rows),
+            )
+        return self._open_csv(path, column_types or {})
+
+    def _open_csv(self, path: Path, column_types: Dict[str, str]) -> pa.RecordBatchReader:
+        # Arrow's streaming reader; columns without a pinned type are inferred
+        # from the first block
+        convert_options = pa_csv.ConvertOptions(
+            column_types={col: pa.type_for_alias(t) for col, t in column_types.items()},
+            # Same null handling as pandas.read_csv: blank and NA-like string
+            # fields are missing values, so required-value checks still fire
+            null_values=CSV_NULL_VALUES,
+            strings_can_be_null=True,
+        )
+        return pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(block_size=64 << 20),
+            convert_options=convert_options,
+        )
+
+    def _log_column_changes(self, columns: List[str], schema: TableSchema) -> Set[str]:
+        """Log missing required and unknown (drifted) columns; return the missing ones."""
+        incoming_cols = set(columns)
+        missing_required_cols = schema.required_set - incoming_cols
+        new_cols = incoming_cols - schema.known_set
 
         if missing_required_cols:
             logger.warning(
@@ -159,50 +319,94 @@ class BatchIngestionPipeline:
                 ", ".join(sorted(new_cols)),
             )
 
-        # Quarantine rows missing required values
-        quarantine_mask = pd.Series(False, index=df.index)
-        reasons: List[str] = []
+        return missing_required_cols
+
+    def _validate_and_split(self, df: pd.DataFrame, schema: TableSchema) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Validate dataframe against schema and split into valid and quarantined records.
+
+        - Rows missing any required column values => quarantine with reason.
+        - Rows outside a declared numeric range => quarantine with reason.
+        - Extra columns (unknown) => logged as schema drift but kept.
+        """
+        incoming_cols = set(df.columns.tolist())
+        missing_required_cols = self._log_column_changes(df.columns.tolist(), schema)
+
+        # Nothing can be quarantined without required columns or ranges; skip the scans
+        if not schema.required_set and not schema.numeric_ranges:
+            logger.info(
+                "Validation complete for table='%s': valid_rows=%d, quarantined_rows=0 (no checks declared)",
+                schema.name,
+                len(df),
+            )
+            return df, df.iloc[0:0]
+
+        # Quarantine rows missing required values. One isna() pass over the
+        # present required columns feeds both the split and the reasons below.
+        present_required = [col for col in schema.required_sorted if col in incoming_cols]
+        na_frame = df[present_required].isna()
+        null_counts = na_frame.sum()
+
+        for col in present_required:
+            if null_counts[col]:
+                logger.info(
+                    "Column '%s' has %d rows with missing values; quarantining those rows",
+                    col,
+                    int(null_counts[col]),
+                )
 
-        for col in sorted(required):
-            if col not in df.columns:
-                # Entire column missing: all rows quarantined for this reason
-                reason = f"missing_required_column:{col}"
+        if missing_required_cols:
+            # Entire column missing: all rows quarantined for this reason
+            for col in sorted(missing_required_cols):
                 logger.info("Quarantining all rows due to missing column '%s'", col)
-                if quarantine_mask.any():
-                    # For rows already quarantined for some other column, append reason
-                    pass
-                quarantine_mask |= True
-                # Build per-row reasons when exporting
-                reasons.append(reason)
-            else:
-                missing_vals = df[col].isna()
-                if missing_vals.any():
-                    logger.info(
-                        "Column '%s' has %d rows with missing values; quarantining those rows",
-                        col,
-                        int(missing_vals.sum()),
-                    )
-                    quarantine_mask |= missing_vals
+            quarantine_mask = pd.Series(True, index=df.index)
+        else:
+            quarantine_mask = na_frame.any(axis=1)
+
+        # Range checks are vectorized comparisons; nulls never count as out of range
+        range_masks: Dict[str, pd.Series] = {}
+        for col, (low, high) in sorted(schema.numeric_ranges.items()):
+            if col not in incoming_cols:
+                continue
+            out_of_range = (df[col] < low) | (df[col] > high)
+            if out_of_range.any():
+                logger.info(
+                    "Column '%s' has %d rows outside [%s, %s]; quarantining those rows",
+                    col,
+                    int(out_of_range.sum()),
+                    low,
+                    high,
+                )
+                quarantine_mask = quarantine_mask | out_of_range
+                range_masks[col] = out_of_range
 
         if quarantine_mask.any():
             logger.info("Total rows to quarantine due to validation: %d", int(quarantine_mask.sum()))
 
-        quarantine_df = df[quarantine_mask].copy()
-        valid_df = df[~quarantine_mask].copy()
+        # No defensive copies: valid_df is never mutated, and the quarantine
+        # frame only gains columns through assign()
+        quarantine_df = df[quarantine_mask]
+        valid_df = df[~quarantine_mask]
 
         # Attach a simple reason column. If multiple issues, we can store a semicolon-separated list.
+        # Built column by column: missing columns apply to every row, then each
+        # required column appends its tag to the rows where it is null.
         if not quarantine_df.empty:
-            quarantine_reasons: List[str] = []
-            for idx, row in quarantine_df.iterrows():
-                row_reasons: List[str] = []
-                for col in sorted(required):
-                    if col not in df.columns:
-                        row_reasons.append(f"missing_required_column:{col}")
-                    else:
-                        if pd.isna(row[col]):
-                            row_reasons.append(f"missing_required_value:{col}")
-                quarantine_reasons.append(";".join(sorted(set(row_reasons))) or "unknown_reason")
-            quarantine_df["quarantine_reason"] = quarantine_reasons
+            quarantine_reasons = pd.Series(
+                ";".join(f"missing_required_column:{col}" for col in sorted(missing_required_cols)),
+                index=quarantine_df.index,
+            )
+            quarantine_na = na_frame[quarantine_mask]
+            for col in present_required:
+                missing_vals = quarantine_na[col]
+                if null_counts[col]:
+                    tagged = quarantine_reasons[missing_vals] + f";missing_required_value:{col}"
+                    quarantine_reasons[missing_vals] = tagged.str.lstrip(";")
+            for col, out_of_range in range_masks.items():
+                bad_vals = out_of_range[quarantine_mask]
+                tagged = quarantine_reasons[bad_vals] + f";out_of_range:{col}"
+                quarantine_reasons[bad_vals] = tagged.str.lstrip(";")
+            quarantine_df = quarantine_df.assign(quarantine_reason=quarantine_reasons.replace("", "unknown_reason"))
 
         logger.info(
             "Validation complete for table='%s': valid_rows=%d, quarantined_rows=%d",
@@ -213,29 +417,19 @@ class BatchIngestionPipeline:
 
         return valid_df, quarantine_df
 
-    def _write_quarantine(self, table_name: str, quarantine_df: pd.DataFrame) -> None:
-        ts = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
-        out_path = self.config.quarantine_dir / f"{table_name}_quarantine_{ts}.csv"
-        logger.info(
-            "Writing %d quarantined rows for table='%s' to '%s'",
-            len(quarantine_df),
-            table_name,
+    def _open_parquet_writer(self, out_path: Path, arrow_schema: pa.Schema) -> pq.ParquetWriter:
+        return pq.ParquetWriter(
             out_path,
+            arrow_schema,
+            compression=self.config.parquet_compression,
+            compression_level=3,
+            use_dictionary=True,
+            data_page_size=1 << 20,
+            write_statistics=True,
         )
-        quarantine_df.to_csv(out_path, index=False)
-
-    def _write_parquet(self, table_name: str, valid_df: pd.DataFrame) -> None:
-        ts = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
-        out_path = self.config.output_dir / f"{table_name}_{ts}.parquet"
-        logger.info(
-            "Writing %d valid rows for table='%s' to Parquet '%s'",
-            len(valid_df),
-            table_name,
-            out_path,
-        )
-        valid_df.to_parquet(out_path, index=False)
 
 
+@lru_cache(maxsize=1)
 def default_schema_registry() -> SchemaRegistry:
     """
     Convenience factory for common retail schemas based on the existing CSVs.
@@ -245,7 +439,13 @@ def default_schema_registry() -> SchemaRegistry:
     # Note: we do not know the exact column layouts from here, so treat all as optional.
     # You should revise these lists based on your actual CSV headers.
     schemas = [
-        TableSchema(name="customers", required_columns=[], optional_columns=[]),
+        TableSchema(
+            name="customers",
+            required_columns=[],
+            optional_columns=[],
+            # "+91..." numbers must stay text; dim_customer.phone is VARCHAR
+            column_types={"phone": "string"},
+        ),
         TableSchema(name="products", required_columns=[], optional_columns=[]),
         TableSchema(name="stores", required_columns=[], optional_columns=[]),
         TableSchema(name="inventory", required_columns=[], optional_columns=[]),
@@ -256,17 +456,24 @@ def default_schema_registry() -> SchemaRegistry:
     return SchemaRegistry(schemas)
 
 
-if __name__ == "__main__":
-    registry = default_schema_registry()
-    pipeline = BatchIngestionPipeline(registry)
+RAW_TABLES = [
+    ("customers", "customers.csv"),
+    ("products", "products.csv"),
+    ("stores", "stores.csv"),
+    ("inventory", "inventory.parquet"),
+    ("transactions", "transactions.parquet"),
+    ("shipments", "shipments.parquet"),
+    ("web_clickstream", "web_clickstream.parquet"),
+]
 
-    # Run ingestion for all tables
-    pipeline.run_for_table("customers", "customers.csv")
-    pipeline.run_for_table("products", "products.csv")
-    pipeline.run_for_table("stores", "stores.csv")
-    pipeline.run_for_table("inventory", "inventory.csv")
-    pipeline.run_for_table("transactions", "transactions.csv")
-    pipeline.run_for_table("shipments", "shipments.csv")
-    pipeline.run_for_table("web_clickstream", "web_clickstream.csv")
 
+def _run_one(table: Tuple[str, str]) -> None:
+    """Ingest one raw file in a worker process with its own pipeline."""
+    table_name, filename = table
+    BatchIngestionPipeline(default_schema_registry()).run_for_table(table_name, filename)
 
+
+if __name__ == "__main__":
+    # Tables are independent and write to separate files, so run them in parallel
+    with ProcessPoolExecutor(max_workers=min(len(RAW_TABLES), os.cpu_count() or 1)) as executor:
+        list(executor.map(_run_one, RAW_TABLES))
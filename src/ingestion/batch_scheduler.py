@@ -12,13 +12,15 @@ import os
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 try:
-    from config import DB_PATH
+    from config import DB_PATH, QUARANTINE_DIR
 except ImportError:
     DB_PATH = 'data/warehouse/retail.duckdb'
+    QUARANTINE_DIR = 'data/quarantine'
 
 class BatchPipelineScheduler:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
+        self.pipeline = None  # built on the first ingestion run, then reused
         self.setup_logging()
         
         try:
@@ -58,6 +60,7 @@ class BatchPipelineScheduler:
         )
         """)
         
+        self.con.execute("CREATE SEQUENCE IF NOT EXISTS pipeline_metrics_seq START 1")
         self.con.execute("""
         CREATE TABLE IF NOT EXISTS pipeline_metrics (
             metric_id INTEGER PRIMARY KEY,
@@ -80,16 +83,16 @@ class BatchPipelineScheduler:
         self.logger.info(f"Starting batch ingestion run #{run_id}")
         
         # Record run start
-        self.con.execute(f"""
+        self.con.execute("""
         INSERT INTO pipeline_runs VALUES (
-            {run_id}, 'batch_ingestion', '{start_time}', NULL, 'running', 0, 0, NULL, 0
+            ?, 'batch_ingestion', ?, NULL, 'running', 0, 0, NULL, 0
         )
-        """)
+        """, [run_id, start_time])
         
         try:
             # Import with error handling to avoid crashes if modules are missing
             try:
-                from ingestion.batch_pipeline import BatchIngestionPipeline
+                from ingestion.batch_pipeline import BatchIngestionPipeline, default_schema_registry
             except ImportError:
                 self.logger.error("Could not import BatchIngestionPipeline")
                 raise
@@ -105,15 +108,18 @@ class BatchPipelineScheduler:
             except ImportError:
                 self.logger.warning("Partitioning module not found - skipping")
                 partition_all = None
-                
-            from ingestion.adaptive_schema_manager import AdaptiveSchemaManager
             
-            # Stage 1: Ingest with adaptive schema
+            # Stage 1: Ingest against the schema registry
             self.logger.info("Stage 1: Ingesting data...")
-            pipeline = BatchIngestionPipeline()
-            schema_manager = AdaptiveSchemaManager()
+            if self.pipeline is None:
+                self.pipeline = BatchIngestionPipeline(default_schema_registry())
+            pipeline = self.pipeline
             
-            ingest_results = pipeline.run_all(schema_manager=schema_manager)
+            # Scheduled runs validate against the registry only. Adaptive drift
+            # detection and approval-queue entries are no longer raised here;
+            # they run on the manual path via
+            # AdaptiveSchemaManager.process_ingestion_with_adaptive_schema.
+            ingest_results = pipeline.run_all()
             rows_processed = ingest_results['total_rows']
             rows_quarantined = ingest_results['quarantined_rows']
             
@@ -121,7 +127,7 @@ class BatchPipelineScheduler:
             if DataCleaner:
                 self.logger.info("Stage 2: Cleaning data...")
                 cleaner = DataCleaner()
-                clean_results = cleaner.run_all()
+                clean_results = cleaner.run()
             else:
                 clean_results = {'duplicates_removed': 0, 'nulls_fixed': 0, 'anomalies_flagged': 0}
             
@@ -137,15 +143,15 @@ class BatchPipelineScheduler:
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
             
-            self.con.execute(f"""
+            self.con.execute("""
             UPDATE pipeline_runs 
-            SET end_time = '{end_time}',
+            SET end_time = ?,
                 status = 'success',
-                rows_processed = {rows_processed},
-                rows_quarantined = {rows_quarantined},
-                duration_seconds = {duration}
-            WHERE run_id = {run_id}
-            """)
+                rows_processed = ?,
+                rows_quarantined = ?,
+                duration_seconds = ?
+            WHERE run_id = ?
+            """, [end_time, rows_processed, rows_quarantined, duration, run_id])
             
             self.logger.info(f"✅ Run #{run_id} completed successfully in {duration:.1f}s")
             
@@ -158,17 +164,14 @@ class BatchPipelineScheduler:
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
             
-            # Escape error message for SQL
-            error_msg = str(e).replace("'", "''")
-            
-            self.con.execute(f"""
+            self.con.execute("""
             UPDATE pipeline_runs 
-            SET end_time = '{end_time}',
+            SET end_time = ?,
                 status = 'failed',
-                duration_seconds = {duration},
-                error_message = '{error_msg}'
-            WHERE run_id = {run_id}
-            """)
+                duration_seconds = ?,
+                error_message = ?
+            WHERE run_id = ?
+            """, [end_time, duration, str(e), run_id])
             
             self.logger.error(f"❌ Run #{run_id} failed: {str(e)}")
             
@@ -204,10 +207,10 @@ class BatchPipelineScheduler:
             GROUP BY product_id, store_id
             ORDER BY SUM(revenue) DESC
             LIMIT 20
-            """).fetchdf()
+            """).fetchall()
             
-            for _, row in top_combos.iterrows():
-                engine.train_demand_forecaster(row['product_id'], row['store_id'])
+            for product_id, store_id in top_combos:
+                engine.train_demand_forecaster(product_id, store_id)
             
             self.logger.info("✅ ML retraining completed")
             
@@ -223,15 +226,18 @@ class BatchPipelineScheduler:
             'data_quality_score': clean_results.get('quality_score', 0)
         }
         
-        for metric_name, value in metrics.items():
-            try:
-                self.con.execute(f"""
-                INSERT INTO pipeline_metrics VALUES (
-                    NULL, {run_id}, '{metric_name}', {value}, CURRENT_TIMESTAMP
-                )
-                """)
-            except Exception as e:
-                self.logger.error(f"Failed to record metric {metric_name}: {e}")
+        # One transaction so the whole metric set commits (and is stamped) together
+        self.con.begin()
+        try:
+            self.con.executemany("""
+            INSERT INTO pipeline_metrics VALUES (
+                nextval('pipeline_metrics_seq'), ?, ?, ?, CURRENT_TIMESTAMP
+            )
+            """, [[run_id, name, float(value)] for name, value in metrics.items()])
+            self.con.commit()
+        except Exception as e:
+            self.con.rollback()
+            self.logger.error(f"Failed to record metrics for run #{run_id}: {e}")
     
     async def send_failure_alert(self, run_id, error):
         """Send WhatsApp alert on pipeline failure"""
@@ -286,12 +292,12 @@ class BatchPipelineScheduler:
     async def check_data_quality(self):
         """Monitor data quality metrics"""
         try:
-            # Check for anomalies in recent data if table exists
+            # Quarantined rows are written as Parquet by the batch pipeline
             recent_issues = self.con.execute("""
             SELECT COUNT(*) as issue_count
-            FROM quarantine_log
-            WHERE timestamp >= CURRENT_TIMESTAMP - INTERVAL '30 minutes'
-            """).fetchone()[0]
+            FROM read_parquet(?, union_by_name = true)
+            WHERE quarantined_at >= CURRENT_TIMESTAMP - INTERVAL '30 minutes'
+            """, [f"{QUARANTINE_DIR}/*.parquet"]).fetchone()[0]
             
             if recent_issues > 100:
                 self.logger.warning(f"⚠️ High quarantine rate: {recent_issues} records in last 30 min")
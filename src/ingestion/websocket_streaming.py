@@ -1,6 +1,6 @@
 import asyncio
 import websockets
-import json
+import orjson
 import duckdb
 import random
 import os
@@ -22,13 +22,26 @@ try:
 except:
     ML_ENABLED = False
 
+# Orders are buffered and written by a periodic flush, or sooner once the
+# buffer reaches ORDER_FLUSH_ROWS
+ORDER_FLUSH_ROWS = 500
+ORDER_FLUSH_SECONDS = 5.0
+
+# Messages queued per client before it is treated as too slow and dropped
+CLIENT_QUEUE_SIZE = 256
+
+# Clients handed a message before broadcast yields back to the event loop
+BROADCAST_BATCH = 64
+
 
 class WebSocketOrderStream:
 
     def __init__(self, host="localhost", port=8765):
         self.host = host
         self.port = port
-        self.connected_clients = set()
+        # websocket -> outgoing message queue drained by that client's sender
+        self.connected_clients = {}
+        self._close_tasks = set()
 
         self.con = duckdb.connect(DB_PATH)
         print("Connected to database.")
@@ -45,6 +58,25 @@ class WebSocketOrderStream:
             )
         """)
 
+        # Per-day order counters kept in step with streaming_orders so
+        # dashboards can read today's totals without scanning the orders
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS streaming_stats_rollup (
+                day DATE PRIMARY KEY,
+                orders BIGINT,
+                revenue DOUBLE
+            )
+        """)
+
+        # Backfill days recorded before the rollup existed
+        self.con.execute("""
+            INSERT INTO streaming_stats_rollup
+            SELECT CAST(timestamp AS DATE), COUNT(*), SUM(price * quantity)
+            FROM streaming_orders
+            GROUP BY 1
+            ON CONFLICT DO NOTHING
+        """)
+
         # Create ML alerts table
         self.con.execute("""
             CREATE TABLE IF NOT EXISTS ml_alerts (
@@ -57,6 +89,9 @@ class WebSocketOrderStream:
             )
         """)
 
+        self._order_buffer = []
+        self._ml_pending = []
+
         # Demo spike mode
         self.demo_spike = False
         self.spike_product = None
@@ -82,18 +117,155 @@ class WebSocketOrderStream:
     # CLIENT MGMT
     # ===============================
     async def register(self, websocket):
-        self.connected_clients.add(websocket)
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.connected_clients[websocket] = queue
+        return queue
 
     async def unregister(self, websocket):
-        self.connected_clients.remove(websocket)
+        self.connected_clients.pop(websocket, None)
+
+    async def _drain(self, websocket, queue):
+        try:
+            while True:
+                await websocket.send(await queue.get())
+        except websockets.exceptions.ConnectionClosed:
+            pass
 
     async def broadcast(self, message):
-        if self.connected_clients:
-            await asyncio.gather(
-                *[client.send(json.dumps(message)) for client in self.connected_clients],
-                return_exceptions=True
+        if not self.connected_clients:
+            return
+
+        # Encoded once and shared by every client's queue
+        payload = orjson.dumps(message).decode()
+
+        clients = list(self.connected_clients.items())
+        full = []
+
+        for i, (client, queue) in enumerate(clients, 1):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                full.append((client, queue))
+
+            # Let senders and the order generator run between batches
+            if i % BROADCAST_BATCH == 0 and i < len(clients):
+                await asyncio.sleep(0)
+
+        # Always yield once per broadcast so senders drain bursts; a client is
+        # only treated as slow if its queue is still full after that
+        await asyncio.sleep(0)
+
+        for client, queue in full:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                print(f"Dropping slow client {client.remote_address}")
+                await self.unregister(client)
+                # Held until done so the close can't be garbage-collected mid-way
+                task = asyncio.create_task(client.close())
+                self._close_tasks.add(task)
+                task.add_done_callback(self._close_tasks.discard)
+
+    # ===============================
+    # ORDER BUFFER
+    # ===============================
+    def _flush_orders(self):
+        if not self._order_buffer:
+            return
+
+        rollup = {}
+        for _, ts, _, _, quantity, price in self._order_buffer:
+            orders, revenue = rollup.get(ts.date(), (0, 0.0))
+            rollup[ts.date()] = (orders + 1, revenue + price * quantity)
+
+        self.con.begin()
+        try:
+            self.con.executemany("""
+                INSERT INTO streaming_orders VALUES (?, ?, ?, ?, ?, ?)
+            """, self._order_buffer)
+            self.con.executemany("""
+                INSERT INTO streaming_stats_rollup VALUES (?, ?, ?)
+                ON CONFLICT (day) DO UPDATE SET
+                    orders = orders + EXCLUDED.orders,
+                    revenue = revenue + EXCLUDED.revenue
+            """, [(day, orders, revenue) for day, (orders, revenue) in rollup.items()])
+            self.con.commit()
+        except Exception:
+            self.con.rollback()
+            raise
+
+        # Only drop rows once they are committed; a failed flush retries them
+        self._order_buffer.clear()
+
+    async def _flush(self):
+        self._flush_orders()
+        await self._flush_ml_checks()
+
+    async def flush_loop(self):
+        try:
+            while True:
+                await asyncio.sleep(ORDER_FLUSH_SECONDS)
+                try:
+                    await self._flush()
+                except Exception as e:
+                    print("Flush error:", e)
+        finally:
+            # Persist whatever is still buffered when the stream shuts down,
+            # and score the orders that were waiting on the next flush
+            try:
+                self._flush_orders()
+            finally:
+                await self._flush_ml_checks()
+
+    async def _flush_ml_checks(self):
+        if not self._ml_pending:
+            return
+
+        # One query and one model call for every pair ordered since the last flush
+        pairs = list(dict.fromkeys(self._ml_pending))
+        self._ml_pending.clear()
+
+        try:
+            predictions = self.ml_engine.predict_batch(
+                [product_id for product_id, _ in pairs],
+                [store_id for _, store_id in pairs]
             )
 
+            alerts = predictions[predictions["risk_level"].isin(["High", "Critical"])]
+            if alerts.empty:
+                return
+
+            now = datetime.now()
+            rows = [
+                (now, product_id, store_id, risk, round(float(prob) * 100, 2), int(reorder))
+                for product_id, store_id, prob, risk, reorder
+                in alerts.itertuples(index=False, name=None)
+            ]
+
+            self.con.executemany("""
+                INSERT INTO ml_alerts VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+
+            for _, product_id, store_id, risk, confidence, reorder in rows:
+                print("\n🚨 ML ALERT")
+                print(f"   Product: {product_id}")
+                print(f"   Store: {store_id}")
+                print(f"   Risk: {risk}")
+                print(f"   Confidence: {confidence}%")
+                print(f"   Reorder: {reorder} units\n")
+
+                await self.broadcast({
+                    "type": "ml_alert",
+                    "product_id": product_id,
+                    "store_id": store_id,
+                    "risk_level": risk,
+                    "confidence": confidence,
+                    "reorder": reorder
+                })
+
+        except Exception as e:
+            print("ML error:", e)
+
     # ===============================
     # ORDER GENERATOR
     # ===============================
@@ -119,72 +291,37 @@ class WebSocketOrderStream:
 
                 price = round(random.uniform(100, 3000), 2)
 
-                self.con.execute("""
-                    INSERT INTO streaming_orders VALUES (?, ?, ?, ?, ?, ?)
-                """, [
+                self._order_buffer.append((
                     order_id,
                     datetime.now(),
                     product_id,
                     store_id,
                     quantity,
                     price
-                ])
+                ))
 
-                print(f"✓ Order #{order_id} — ₹{price}")
+                # Advance now so a failed flush, which keeps the row
+                # buffered, can't lead to the id being reused
+                current_id = order_id
+                order_id += 1
 
-                # ================= ML ALERT =================
+                # Checked in batches alongside the order flush
                 if self.ml_engine:
-                    try:
-                        result = self.ml_engine.predict_stockout_with_explanation(
-                            product_id,
-                            store_id
-                        )
-
-                        if result:
-                            risk = result["explanation"]["risk_level"]
-                            confidence = result["explanation"]["ml_confidence"]
-                            reorder = result["recommended_reorder"]
-
-                            if risk in ["High", "Critical"]:
-                                print("\n🚨 ML ALERT")
-                                print(f"   Product: {product_id}")
-                                print(f"   Store: {store_id}")
-                                print(f"   Risk: {risk}")
-                                print(f"   Confidence: {confidence}%")
-                                print(f"   Reorder: {reorder} units\n")
-
-                                self.con.execute("""
-                                    INSERT INTO ml_alerts VALUES (?, ?, ?, ?, ?, ?)
-                                """, [
-                                    datetime.now(),
-                                    product_id,
-                                    store_id,
-                                    risk,
-                                    confidence,
-                                    reorder
-                                ])
-
-                                await self.broadcast({
-                                    "type": "ml_alert",
-                                    "product_id": product_id,
-                                    "store_id": store_id,
-                                    "risk_level": risk,
-                                    "confidence": confidence,
-                                    "reorder": reorder
-                                })
-
-                    except Exception as e:
-                        print("ML error:", e)
+                    self._ml_pending.append((product_id, store_id))
+
+                if len(self._order_buffer) >= ORDER_FLUSH_ROWS:
+                    await self._flush()
+
+                print(f"✓ Order #{current_id} — ₹{price}")
 
                 await self.broadcast({
                     "type": "order",
-                    "order_id": order_id,
+                    "order_id": current_id,
                     "product_id": product_id,
                     "store_id": store_id,
                     "price": price
                 })
 
-                order_id += 1
                 await asyncio.sleep(random.uniform(1, 3))
 
             except Exception as e:
@@ -195,19 +332,22 @@ class WebSocketOrderStream:
     # SERVER
     # ===============================
     async def handler(self, websocket):
-        await self.register(websocket)
+        queue = await self.register(websocket)
+        queue.put_nowait(orjson.dumps({
+            "type": "connected",
+            "message": "Live stream started"
+        }).decode())
+        sender = asyncio.create_task(self._drain(websocket, queue))
         try:
-            await websocket.send(json.dumps({
-                "type": "connected",
-                "message": "Live stream started"
-            }))
             async for _ in websocket:
                 pass
         finally:
+            sender.cancel()
             await self.unregister(websocket)
 
     async def start(self):
         asyncio.create_task(self.order_generator())
+        asyncio.create_task(self.flush_loop())
         async with websockets.serve(self.handler, self.host, self.port):
             print(f"🚀 WebSocket running at ws://{self.host}:{self.port}")
             await asyncio.Future()
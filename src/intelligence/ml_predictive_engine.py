@@ -1,3 +1,4 @@
+import time
 import duckdb
 import pandas as pd
 import numpy as np
@@ -7,6 +8,37 @@ from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
 
 DB_PATH = "data/warehouse/retail.duckdb"
 
+FEATURES = [
+    "current_stock",
+    "avg_sales_7d",
+    "stddev_sales_7d",
+    "category_encoded"
+]
+
+# Risk labels from least to most severe
+RISK_LEVELS = ["Low", "Medium", "High", "Critical"]
+
+# Per (product, store) predictions are reused for this many seconds
+PREDICTION_CACHE_TTL = 30
+PREDICTION_CACHE_SIZE = 5000
+
+BATCH_COLUMNS = [
+    "product_id",
+    "store_id",
+    "risk_prob",
+    "risk_level",
+    "recommended_reorder"
+]
+
+
+def _feature_matrix(columns, n):
+    """Stack fetched feature columns into the float32 layout the tree models use."""
+    X = np.empty((n, len(FEATURES)), dtype=np.float32)
+    for i, name in enumerate(FEATURES):
+        # NULLs arrive as masked entries; models see them as NaN
+        X[:, i] = np.ma.filled(columns[name].astype(np.float32), np.nan)
+    return X
+
 
 class MLPredictiveEngine:
 
@@ -22,6 +54,9 @@ class MLPredictiveEngine:
             random_state=42
         )
 
+        # (product_id, store_id) -> (expires_at, result)
+        self._prediction_cache = {}
+
         self._train_models()
 
 
@@ -60,14 +95,7 @@ class MLPredictiveEngine:
             0
         )
 
-        features = [
-            "current_stock",
-            "avg_sales_7d",
-            "stddev_sales_7d",
-            "category_encoded"
-        ]
-
-        X = df[features]
+        X = df[FEATURES].to_numpy(dtype=np.float32)
         y_class = df["risk"]
         y_reg = df["reorder_qty"]
 
@@ -80,33 +108,48 @@ class MLPredictiveEngine:
     # =========================
     def predict_stockout_with_explanation(self, product_id, store_id):
 
+        key = (product_id, store_id)
+        now = time.monotonic()
+
+        cached = self._prediction_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        result = self._predict_one(product_id, store_id)
+
+        # Re-inserting moves a refreshed key to the back of the eviction order
+        self._prediction_cache.pop(key, None)
+        if len(self._prediction_cache) >= PREDICTION_CACHE_SIZE:
+            # Drop the oldest entry; dicts keep insertion order
+            self._prediction_cache.pop(next(iter(self._prediction_cache)))
+        self._prediction_cache[key] = (now + PREDICTION_CACHE_TTL, result)
+
+        return result
+
+
+    def _predict_one(self, product_id, store_id):
+
         try:
-            df = self.con.execute(f"""
+            columns = self.con.execute("""
                 SELECT 
                     current_stock,
                     avg_sales_7d,
                     stddev_sales_7d,
                     category_encoded
                 FROM fact_inventory
-                WHERE product_id = '{product_id}'
-                AND store_id = '{store_id}'
+                WHERE product_id = ?
+                AND store_id = ?
+                ORDER BY date_key DESC
                 LIMIT 1
-            """).fetchdf()
+            """, [product_id, store_id]).fetchnumpy()
 
-            if df.empty:
+            if len(columns["current_stock"]) == 0:
                 return None
 
         except:
             return None
 
-        features = [
-            "current_stock",
-            "avg_sales_7d",
-            "stddev_sales_7d",
-            "category_encoded"
-        ]
-
-        X = df[features]
+        X = _feature_matrix(columns, 1)
 
         risk_prob = self.classifier.predict_proba(X)[0][1]
         reorder_qty = int(self.regressor.predict(X)[0])
@@ -129,3 +172,64 @@ class MLPredictiveEngine:
             "recommended_reorder": reorder_qty,
             "explanation": explanation
         }
+
+
+    def predict_batch(self, product_ids=None, store_ids=None):
+        """
+        Predict stockout risk for many (product, store) pairs at once.
+
+        Features for all pairs are fetched with one query and each model is
+        called once on the full matrix. When no ids are given, every pair in
+        fact_inventory is scored, using each pair's latest snapshot. Returns
+        an empty frame when fact_inventory is missing or lacks the feature
+        columns.
+        """
+
+        if product_ids is None:
+            where, params = "", []
+        else:
+            pairs = list(zip(product_ids, store_ids))
+            if not pairs:
+                return pd.DataFrame(columns=BATCH_COLUMNS)
+            values = ", ".join(["(?, ?)"] * len(pairs))
+            where = f"WHERE (product_id, store_id) IN (VALUES {values})"
+            params = [v for pair in pairs for v in pair]
+
+        try:
+            columns = self.con.execute(f"""
+                SELECT
+                    product_id,
+                    store_id,
+                    current_stock,
+                    avg_sales_7d,
+                    stddev_sales_7d,
+                    category_encoded
+                FROM fact_inventory
+                {where}
+                QUALIFY ROW_NUMBER() OVER (
+                    PARTITION BY product_id, store_id ORDER BY date_key DESC
+                ) = 1
+            """, params).fetchnumpy()
+        except duckdb.Error:
+            return pd.DataFrame(columns=BATCH_COLUMNS)
+
+        n = len(columns["product_id"])
+        if n == 0:
+            return pd.DataFrame(columns=BATCH_COLUMNS)
+
+        X = _feature_matrix(columns, n)
+
+        risk_prob = self.classifier.predict_proba(X)[:, 1]
+        reorder_qty = self.regressor.predict(X).astype(int)
+
+        return pd.DataFrame({
+            "product_id": columns["product_id"],
+            "store_id": columns["store_id"],
+            "risk_prob": risk_prob,
+            "risk_level": np.select(
+                [risk_prob > 0.8, risk_prob > 0.6, risk_prob > 0.4],
+                ["Critical", "High", "Medium"],
+                default="Low"
+            ),
+            "recommended_reorder": reorder_qty
+        })
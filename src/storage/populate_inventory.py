@@ -5,38 +5,31 @@ from datetime import datetime
 import os
 
 DB_PATH = "data/warehouse/retail.duckdb"
-CSV_PATH = "data/raw/inventory.csv"
+PARQUET_PATH = "data/raw/inventory.parquet"
 
 def populate_inventory():
     print(f"Connecting to {DB_PATH}...")
     con = duckdb.connect(DB_PATH)
 
-    print(f"Reading {CSV_PATH}...")
-    # The header says (date, store_id, product_id, stock_level)
-    # But data is (store_id, product_id, date, stock_level)
-    # We load it and rename columns correctly
-    df = pd.read_csv(CSV_PATH)
-    
-    # Rename columns to match actual data in the file
-    df.columns = ['actual_store_id', 'actual_product_id', 'actual_date', 'actual_stock_level']
+    print(f"Reading {PARQUET_PATH}...")
+    # The id columns are dictionary-encoded in the file; keeping them as
+    # categoricals means the key lookups below only map the distinct ids.
+    df = pd.read_parquet(PARQUET_PATH, read_dictionary=["store_id", "product_id"])
     
     print("Mapping date to date_key...")
-    df['date_key'] = pd.to_datetime(df['actual_date']).dt.strftime('%Y%m%d').astype(int)
+    df['date_key'] = pd.to_datetime(df['date']).dt.strftime('%Y%m%d').astype(int)
 
     print("Mapping product_id to product_key...")
     # Get mapping from dim_product
     product_map = con.execute("SELECT product_id, product_key FROM dim_product").fetchdf()
     product_dict = dict(zip(product_map['product_id'], product_map['product_key']))
-    df['product_key'] = df['actual_product_id'].map(product_dict)
+    df['product_key'] = df['product_id'].map(product_dict)
 
     print("Mapping store_id to store_key...")
     # Get mapping from dim_store
     store_map = con.execute("SELECT store_id, store_key FROM dim_store").fetchdf()
     store_dict = dict(zip(store_map['store_id'], store_map['store_key']))
-    df['store_key'] = df['actual_store_id'].map(store_dict)
-    
-    # Define stock_level correctly
-    df['stock_level'] = df['actual_stock_level']
+    df['store_key'] = df['store_id'].map(store_dict)
 
     # Some data might not map if IDs were changed, fill with random keys if necessary or just drop
     # For this test, we expect them to match.
@@ -47,7 +40,7 @@ def populate_inventory():
 
     print("Preparing fact_inventory table data...")
     # Cols: inventory_id, date_key, product_key, store_key, stock_level, reorder_point
-    # We don't have reorder_point in CSV, so we generate it
+    # We don't have reorder_point in the raw file, so we generate it
     df['reorder_point'] = 20  # Constant for demo
     
     # Register as a temporary table for DuckDB to ingest
@@ -5,9 +5,13 @@ Drops and recreates all dimension and fact tables, then loads from:
 - data/raw/customers.csv      → dim_customer
 - data/raw/products.csv      → dim_product
 - data/raw/stores.csv        → dim_store
+- static city → tier mapping  → dim_city_tier
 - generate_series 2024        → dim_date
 - data/raw/transactions_cleaned.parquet → fact_sales (with FK joins)
 
+and materializes the KPI summary tables (mv_daily_revenue, mv_city_sales,
+mv_customer_distribution) read by src/analytics/kpi.py.
+
 Run: python src/transformation/build_schema.py
 """
 
@@ -43,6 +47,9 @@ def _drop_all_tables(con: duckdb.DuckDBPyConnection) -> None:
     """Drop fact and dimension tables in dependency order."""
     print("\n--- Dropping existing tables ---")
     for table in [
+        "mv_daily_revenue",
+        "mv_city_sales",
+        "mv_customer_distribution",
         "fact_sales",
         "fact_inventory",
         "fact_shipments",
@@ -50,6 +57,7 @@ def _drop_all_tables(con: duckdb.DuckDBPyConnection) -> None:
         "dim_customer",
         "dim_product",
         "dim_store",
+        "dim_city_tier",
         "dim_external_events",
     ]:
         con.execute(f"DROP TABLE IF EXISTS {table}")
@@ -300,6 +308,88 @@ def _create_placeholder_tables(con: duckdb.DuckDBPyConnection) -> None:
     print("  dim_external_events, fact_inventory, fact_shipments created (empty).")
 
 
+def _create_dim_city_tier(con: duckdb.DuckDBPyConnection) -> None:
+    """Create dim_city_tier; cities not listed are treated as Tier-2."""
+    print("\n--- dim_city_tier ---")
+    con.execute("""
+        CREATE TABLE dim_city_tier (
+            city VARCHAR,
+            city_tier VARCHAR
+        )
+    """)
+    con.execute("""
+        INSERT INTO dim_city_tier VALUES
+            ('Mumbai', 'Metro'),
+            ('Delhi', 'Metro'),
+            ('Bangalore', 'Metro'),
+            ('Pune', 'Tier-1'),
+            ('Hyderabad', 'Tier-1'),
+            ('Chennai', 'Tier-1')
+    """)
+    n = con.execute("SELECT COUNT(*) FROM dim_city_tier").fetchone()[0]
+    print(f"  Rows: {n}")
+
+
+def _create_kpi_summaries(con: duckdb.DuckDBPyConnection) -> None:
+    """Pre-aggregate fact_sales for the KPI API so requests do not rescan the fact table."""
+    print("\n--- KPI summary tables ---")
+    con.execute("""
+        CREATE TABLE mv_daily_revenue AS
+        SELECT
+            date_key,
+            strptime(CAST(date_key AS VARCHAR), '%Y%m%d')::DATE AS date,
+            SUM(revenue) AS total_revenue
+        FROM fact_sales
+        GROUP BY date_key
+    """)
+    con.execute("""
+        CREATE TABLE mv_city_sales AS
+        SELECT
+            ds.city,
+            ds.region,
+            COUNT(DISTINCT fs.store_key) as active_stores,
+            SUM(fs.revenue) as total_revenue,
+            COUNT(fs.sale_id) as transaction_count,
+            AVG(fs.revenue) as avg_transaction_value,
+            SUM(fs.quantity) as total_units_sold,
+            ROUND(SUM(fs.revenue) * 100.0 / SUM(SUM(fs.revenue)) OVER (), 2) as revenue_share_pct
+        FROM fact_sales fs
+        JOIN dim_store ds ON fs.store_key = ds.store_key
+        GROUP BY ds.city, ds.region
+    """)
+    con.execute("""
+        CREATE TABLE mv_customer_distribution AS
+        SELECT
+            dc.city,
+            COALESCE(ANY_VALUE(ct.city_tier), 'Tier-2') as city_tier,
+            COUNT(DISTINCT fs.customer_key) as customer_count,
+            SUM(fs.revenue) as total_revenue,
+            AVG(fs.revenue) as avg_clv,
+            COUNT(fs.sale_id) as total_transactions,
+            AVG(fs.revenue) as avg_transaction_value,
+            (MAX(fs.date_key) - MIN(fs.date_key)) as customer_lifespan_days,
+            CASE
+                WHEN COUNT(fs.sale_id) = 1 THEN 'One-time'
+                WHEN COUNT(fs.sale_id) <= 5 THEN 'Occasional'
+                WHEN COUNT(fs.sale_id) <= 15 THEN 'Regular'
+                ELSE 'Loyal'
+            END as purchase_frequency_segment,
+            CASE
+                WHEN SUM(fs.revenue) < 1000 THEN 'Low Value'
+                WHEN SUM(fs.revenue) < 5000 THEN 'Medium Value'
+                WHEN SUM(fs.revenue) < 20000 THEN 'High Value'
+                ELSE 'Premium'
+            END as value_segment
+        FROM fact_sales fs
+        JOIN dim_customer dc ON fs.customer_key = dc.customer_key
+        LEFT JOIN dim_city_tier ct ON dc.city = ct.city
+        GROUP BY dc.city
+    """)
+    for table in ["mv_daily_revenue", "mv_city_sales", "mv_customer_distribution"]:
+        n = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        print(f"  {table}: {n} rows")
+
+
 def build_star_schema() -> None:
     """Full deterministic rebuild: drop all, create all, load from CSV/parquet."""
     print("=" * 60)
@@ -316,7 +406,9 @@ def build_star_schema() -> None:
         _create_dim_customer(con)
         _create_dim_product(con)
         _create_dim_store(con)
+        _create_dim_city_tier(con)
         _create_fact_sales(con)
+        _create_kpi_summaries(con)
         _create_placeholder_tables(con)
 
         print("\n--- Final row counts ---")
@@ -7,7 +7,7 @@ class DataCleaner:
     """
     Clean transactions data before loading into star schema.
     
-    Reads from data/raw/transactions.csv (or .parquet fallback),
+    Reads from data/raw/transactions.parquet (or .csv fallback),
     applies cleaning steps, and saves cleaned data.
     """
 
@@ -18,22 +18,22 @@ class DataCleaner:
 
     def _load_data(self) -> pd.DataFrame:
         """
-        Load transactions data from CSV first, fallback to Parquet.
+        Load transactions data from Parquet first, fallback to CSV.
         Raises FileNotFoundError if neither exists.
         """
-        if self.csv_path.exists():
-            print(f"Reading transactions from CSV: {self.csv_path}")
-            df = pd.read_csv(self.csv_path)
-            return df
-        elif self.parquet_path.exists():
-            print(f"CSV not found. Reading transactions from Parquet: {self.parquet_path}")
+        if self.parquet_path.exists():
+            print(f"Reading transactions from Parquet: {self.parquet_path}")
             df = pd.read_parquet(self.parquet_path)
             return df
+        elif self.csv_path.exists():
+            print(f"Parquet not found. Reading transactions from CSV: {self.csv_path}")
+            df = pd.read_csv(self.csv_path)
+            return df
         else:
             raise FileNotFoundError(
                 f"Neither transactions file found:\n"
-                f"  - CSV: {self.csv_path}\n"
                 f"  - Parquet: {self.parquet_path}\n"
+                f"  - CSV: {self.csv_path}\n"
                 f"Please ensure at least one file exists."
             )
 
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for batch pipeline validation
+Checks the quarantine reasons _validate_and_split attaches for missing values and numeric ranges
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.ingestion.batch_pipeline import (
+    BatchIngestionPipeline,
+    IngestionConfig,
+    SchemaRegistry,
+    TableSchema,
+)
+
+
+def _pipeline(tmp, schema):
+    config = IngestionConfig(
+        raw_dir=Path(tmp),
+        quarantine_dir=Path(tmp) / "quarantine",
+        output_dir=Path(tmp) / "out",
+    )
+    return BatchIngestionPipeline(SchemaRegistry([schema]), config)
+
+
+def test_numeric_range_quarantine_reasons():
+    """Out-of-range rows are quarantined and tagged per column; nulls never count as out of range"""
+    schema = TableSchema(
+        name="transactions",
+        required_columns=["transaction_id"],
+        numeric_ranges={"price": (0.0, 1000.0), "quantity": (1, 100)},
+    )
+    df = pd.DataFrame({
+        "transaction_id": [1, 2, 3, None, 5, 6],
+        "price": [10.0, -5.0, 2000.0, 20.0, None, -1.0],
+        "quantity": [1, 2, 3, 4, 5, 0],
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        valid_df, quarantine_df = _pipeline(tmp, schema)._validate_and_split(df, schema)
+
+    assert valid_df["transaction_id"].tolist() == [1, 5]
+    reasons = dict(zip(quarantine_df.index, quarantine_df["quarantine_reason"]))
+    assert reasons == {
+        1: "out_of_range:price",
+        2: "out_of_range:price",
+        3: "missing_required_value:transaction_id",
+        5: "out_of_range:price;out_of_range:quantity",
+    }
+
+
+def test_missing_required_column_with_range():
+    """A missing required column quarantines every row; range tags are appended after it"""
+    schema = TableSchema(
+        name="transactions",
+        required_columns=["store_id"],
+        numeric_ranges={"price": (0.0, 1000.0)},
+    )
+    df = pd.DataFrame({"price": [10.0, 5000.0]})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        valid_df, quarantine_df = _pipeline(tmp, schema)._validate_and_split(df, schema)
+
+    assert valid_df.empty
+    assert quarantine_df["quarantine_reason"].tolist() == [
+        "missing_required_column:store_id",
+        "missing_required_column:store_id;out_of_range:price",
+    ]
+
+
+def test_blank_csv_string_field_is_quarantined():
+    """Blank and NA-like string fields in a CSV are nulls, so a required string column quarantines them"""
+    schema = TableSchema(name="customers", required_columns=["customer_id", "name"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, "customers.csv").write_text(
+            "customer_id,name,city\n"
+            "C1,Asha,Mumbai\n"
+            "C2,,Pune\n"
+            "C3,NA,Delhi\n"
+            "C4,Ravi,\n"
+        )
+        pipeline = _pipeline(tmp, schema)
+        assert pipeline.run_for_table("customers", "customers.csv") == (2, 2)
+
+        valid = pq.read_table(next((Path(tmp) / "out").glob("customers_*.parquet"))).to_pandas()
+        quarantined = pq.read_table(next((Path(tmp) / "quarantine").glob("customers_quarantine_*.parquet"))).to_pandas()
+
+    assert valid["customer_id"].tolist() == ["C1", "C4"]
+    assert quarantined["customer_id"].tolist() == ["C2", "C3"]
+    assert quarantined["quarantine_reason"].tolist() == ["missing_required_value:name"] * 2
+
+
+def main():
+    """Main test function"""
+    print("RetailOS batch validation testing\n", flush=True)
+
+    for test in (
+        test_numeric_range_quarantine_reasons,
+        test_missing_required_column_with_range,
+        test_blank_csv_string_field_is_quarantined,
+    ):
+        test()
+        print(f"[OK] {test.__name__}", flush=True)
+
+    print("[DONE] Testing completed!", flush=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script for the KPI result cache
+Checks that _ttl_cached reuses results inside CACHE_TTL and recomputes after it
+"""
+
+import importlib
+import os
+import sys
+import tempfile
+
+import duckdb
+
+
+def _load_kpi(tmp, setup_sql=None):
+    """Import src.analytics.kpi against a scratch warehouse prepared by setup_sql."""
+    os.makedirs(os.path.join(tmp, "data", "warehouse"))
+    con = duckdb.connect(os.path.join(tmp, "data", "warehouse", "retail.duckdb"))
+    if setup_sql:
+        con.execute(setup_sql)
+    con.close()
+
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    try:
+        sys.modules.pop("src.analytics.kpi", None)
+        return importlib.import_module("src.analytics.kpi")
+    finally:
+        os.chdir(cwd)
+
+
+def test_ttl_cached_hit_and_expiry():
+    """Second call within the TTL is a hit; after the TTL it recomputes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        kpi = _load_kpi(tmp)
+        clock = [1000.0]
+        calls = []
+
+        real_monotonic = kpi.time.monotonic
+        kpi.time.monotonic = lambda: clock[0]
+        try:
+            @kpi._ttl_cached
+            def sample_kpi():
+                calls.append(clock[0])
+                return [{"value": len(calls)}]
+
+            first = sample_kpi()
+            clock[0] += kpi.CACHE_TTL - 1
+            assert sample_kpi() is first
+            assert len(calls) == 1
+
+            clock[0] += 2
+            refreshed = sample_kpi()
+            assert len(calls) == 2
+            assert refreshed == [{"value": 2}]
+        finally:
+            kpi.time.monotonic = real_monotonic
+            kpi.con.close()
+            sys.modules.pop("src.analytics.kpi", None)
+
+
+def test_daily_revenue_is_cached():
+    """get_daily_revenue reuses its result inside the TTL like the other KPIs"""
+    with tempfile.TemporaryDirectory() as tmp:
+        kpi = _load_kpi(tmp, """
+            CREATE TABLE mv_daily_revenue AS
+            SELECT * FROM (VALUES
+                (20240101, DATE '2024-01-01', 100.0),
+                (20240102, DATE '2024-01-02', 250.5)
+            ) t(date_key, date, total_revenue)
+        """)
+        clock = [1000.0]
+
+        real_monotonic = kpi.time.monotonic
+        kpi.time.monotonic = lambda: clock[0]
+        try:
+            first = kpi.get_daily_revenue()
+            assert first == [
+                {"date": "2024-01-02", "revenue": 250.5},
+                {"date": "2024-01-01", "revenue": 100.0},
+            ]
+            assert kpi.get_daily_revenue() is first
+
+            clock[0] += kpi.CACHE_TTL + 1
+            refreshed = kpi.get_daily_revenue()
+            assert refreshed is not first
+            assert refreshed == first
+        finally:
+            kpi.time.monotonic = real_monotonic
+            kpi.con.close()
+            sys.modules.pop("src.analytics.kpi", None)
+
+
+def main():
+    """Main test function"""
+    print("RetailOS KPI cache testing\n", flush=True)
+
+    for test in (
+        test_ttl_cached_hit_and_expiry,
+        test_daily_revenue_is_cached,
+    ):
+        test()
+        print(f"[OK] {test.__name__}", flush=True)
+
+    print("[DONE] Testing completed!", flush=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
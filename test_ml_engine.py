@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for MLPredictiveEngine batch scoring
+Checks predict_batch against missing, mismatched and feature-shaped fact_inventory tables
+"""
+
+import os
+import sys
+import tempfile
+
+import duckdb
+
+import src.intelligence.ml_predictive_engine as engine_module
+from src.intelligence.ml_predictive_engine import BATCH_COLUMNS, MLPredictiveEngine
+
+
+def _engine(db_path, setup_sql=None):
+    """Build an engine against a scratch warehouse prepared by setup_sql."""
+    if setup_sql:
+        con = duckdb.connect(db_path)
+        con.execute(setup_sql)
+        con.close()
+    original = engine_module.DB_PATH
+    engine_module.DB_PATH = db_path
+    try:
+        return MLPredictiveEngine()
+    finally:
+        engine_module.DB_PATH = original
+
+
+def test_predict_batch_missing_table():
+    """No fact_inventory at all: empty frame, not an exception"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(os.path.join(tmp, "retail.duckdb"))
+        result = engine.predict_batch()
+        assert result.empty
+        assert list(result.columns) == BATCH_COLUMNS
+        engine.con.close()
+
+
+def test_predict_batch_mismatched_schema():
+    """The star-schema fact_inventory has no feature columns"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(os.path.join(tmp, "retail.duckdb"), """
+            CREATE TABLE fact_inventory (
+                inventory_id BIGINT,
+                date_key INTEGER,
+                product_key BIGINT,
+                store_key BIGINT,
+                stock_level INTEGER,
+                reorder_point INTEGER
+            )
+        """)
+        assert engine.predict_batch().empty
+        assert engine.predict_batch(["P0001"], ["ST001"]).empty
+        assert engine.predict_stockout_with_explanation("P0001", "ST001") is None
+        engine.con.close()
+
+
+def test_predict_batch_uses_latest_snapshot():
+    """Each pair is scored on its most recent date_key"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(os.path.join(tmp, "retail.duckdb"), """
+            CREATE TABLE fact_inventory AS
+            SELECT * FROM (VALUES
+                (20240101, 'P0001', 'ST001', 100, 1, 1, 0),
+                (20240102, 'P0001', 'ST001', 0, 50, 1, 0),
+                (20240101, 'P0002', 'ST001', 80, 2, 1, 1)
+            ) t(date_key, product_id, store_id, current_stock,
+                avg_sales_7d, stddev_sales_7d, category_encoded)
+        """)
+        result = engine.predict_batch()
+        assert sorted(result["product_id"]) == ["P0001", "P0002"]
+
+        # Scoring the latest snapshot directly must give the same answer
+        latest = engine._predict_one("P0001", "ST001")
+        row = result[result["product_id"] == "P0001"].iloc[0]
+        assert int(row["recommended_reorder"]) == latest["recommended_reorder"]
+        engine.con.close()
+
+
+def main():
+    """Main test function"""
+    print("RetailOS ML engine testing\n", flush=True)
+
+    for test in (
+        test_predict_batch_missing_table,
+        test_predict_batch_mismatched_schema,
+        test_predict_batch_uses_latest_snapshot,
+    ):
+        test()
+        print(f"[OK] {test.__name__}", flush=True)
+
+    print("[DONE] Testing completed!", flush=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,130 @@
+import os
+import tempfile
+
+import src.ingestion.adaptive_schema_manager as schema_module
 from src.ingestion.adaptive_schema_manager import AdaptiveSchemaManager
 import pandas as pd
 import duckdb
 
+
+def test_sample_data_migration():
+    """Old warehouses stored sample_data as JSON text; initialize_registry converts it to VARCHAR[]"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "retail.duckdb")
+        con = duckdb.connect(db_path)
+        con.execute("CREATE SEQUENCE schema_change_seq START 1")
+        con.execute("""
+        CREATE TABLE schema_change_log (
+            change_id INTEGER DEFAULT nextval('schema_change_seq') PRIMARY KEY,
+            table_name VARCHAR,
+            change_type VARCHAR,
+            column_name VARCHAR,
+            old_value VARCHAR,
+            new_value VARCHAR,
+            confidence_score FLOAT,
+            status VARCHAR,
+            detected_at TIMESTAMP,
+            approved_at TIMESTAMP,
+            approved_by VARCHAR,
+            affected_rows INTEGER,
+            sample_data VARCHAR
+        )
+        """)
+        con.execute("""
+        INSERT INTO schema_change_log (table_name, column_name, sample_data)
+        VALUES ('transactions', 'payment_method', '["UPI", "Card"]'),
+               ('transactions', 'empty_col', NULL)
+        """)
+        con.close()
+
+        original = schema_module.DB_PATH
+        schema_module.DB_PATH = db_path
+        try:
+            manager = AdaptiveSchemaManager()
+        finally:
+            schema_module.DB_PATH = original
+
+        manager.initialize_registry()
+        # Running it again must leave the migrated column alone
+        manager.initialize_registry()
+
+        data_type = manager.con.execute("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'schema_change_log' AND column_name = 'sample_data'
+        """).fetchone()[0]
+        assert data_type == "VARCHAR[]"
+
+        rows = manager.con.execute("""
+        SELECT column_name, sample_data FROM schema_change_log ORDER BY change_id
+        """).fetchall()
+        assert rows == [("payment_method", ["UPI", "Card"]), ("empty_col", None)]
+        manager.con.close()
+
+
+def test_registry_upgrade():
+    """initialize_registry refreshes stale registry rows from the defaults but keeps newer-version entries"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "retail.duckdb")
+        con = duckdb.connect(db_path)
+        con.execute("""
+        CREATE TABLE schema_registry (
+            table_name VARCHAR,
+            column_name VARCHAR,
+            col_type VARCHAR,
+            is_required BOOLEAN,
+            version INTEGER,
+            PRIMARY KEY (table_name, column_name)
+        )
+        """)
+        con.execute("""
+        INSERT INTO schema_registry VALUES
+            ('transactions', 'price', 'int64', false, 0),
+            ('transactions', 'payment_method', 'string', true, 2)
+        """)
+        con.close()
+
+        original = schema_module.DB_PATH
+        schema_module.DB_PATH = db_path
+        try:
+            manager = AdaptiveSchemaManager()
+        finally:
+            schema_module.DB_PATH = original
+
+        manager.initialize_registry()
+
+        rows = {
+            col: (col_type, is_required, version)
+            for col, col_type, is_required, version in manager.con.execute("""
+            SELECT column_name, col_type, is_required, version
+            FROM schema_registry WHERE table_name = 'transactions'
+            """).fetchall()
+        }
+        # Older stored entry is brought up to the in-code default
+        assert rows["price"] == ("float64", True, 1)
+        # Entry at a newer version than the defaults is left alone
+        assert rows["payment_method"] == ("string", True, 2)
+        # Columns missing from the stored registry are seeded
+        assert rows["transaction_id"] == ("int64", True, 1)
+
+        schema = manager.schema_registry["transactions"]
+        assert "price" in schema["required"]
+        assert schema["types"]["price"] == "float64"
+        assert schema["version"] == 2
+        manager.con.close()
+
+
 if __name__ == "__main__":
 
     print("=== TESTING SCHEMA MANAGER ===\n")
 
+    print("0️⃣ sample_data migration...")
+    test_sample_data_migration()
+    print("OK\n")
+
+    print("0️⃣ Registry upgrade...")
+    test_registry_upgrade()
+    print("OK\n")
+
     manager = AdaptiveSchemaManager()
     manager.initialize_registry()
 
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming order buffer
+Checks that streaming_stats_rollup accumulates across flushes and matches streaming_orders
+"""
+
+import importlib
+import os
+import sys
+import tempfile
+import types
+from datetime import datetime, timedelta
+
+
+def _import_streaming():
+    """
+    Import websocket_streaming. The rollup path never touches the network, so
+    when websockets is not installed a bare placeholder module stands in for
+    the import only and is removed again afterwards.
+    """
+    try:
+        importlib.import_module("websockets")
+        return importlib.import_module("src.ingestion.websocket_streaming")
+    except ImportError:
+        pass
+
+    placeholder = types.ModuleType("websockets")
+    placeholder.exceptions = types.ModuleType("websockets.exceptions")
+    placeholder.exceptions.ConnectionClosed = type("ConnectionClosed", (Exception,), {})
+    sys.modules["websockets"] = placeholder
+    sys.modules["websockets.exceptions"] = placeholder.exceptions
+    try:
+        return importlib.import_module("src.ingestion.websocket_streaming")
+    finally:
+        del sys.modules["websockets"], sys.modules["websockets.exceptions"]
+
+
+def test_rollup_accumulates_across_flushes():
+    """Two flushes on the same day add up; a second day gets its own row"""
+    streaming = _import_streaming()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original = (streaming.DB_PATH, streaming.ML_ENABLED)
+        streaming.DB_PATH = os.path.join(tmp, "retail.duckdb")
+        streaming.ML_ENABLED = False
+        try:
+            stream = streaming.WebSocketOrderStream()
+        finally:
+            streaming.DB_PATH, streaming.ML_ENABLED = original
+
+        today = datetime(2024, 6, 1, 12, 0)
+        yesterday = today - timedelta(days=1)
+
+        stream._order_buffer.extend([
+            (1, today, "P0001", "ST001", 2, 100.0),
+            (2, today, "P0002", "ST001", 1, 50.0),
+        ])
+        stream._flush_orders()
+        assert stream._order_buffer == []
+
+        stream._order_buffer.extend([
+            (3, today, "P0001", "ST002", 3, 10.0),
+            (4, yesterday, "P0003", "ST001", 1, 25.0),
+        ])
+        stream._flush_orders()
+
+        rollup = stream.con.execute("""
+            SELECT day, orders, revenue FROM streaming_stats_rollup ORDER BY day
+        """).fetchall()
+        assert rollup == [
+            (yesterday.date(), 1, 25.0),
+            (today.date(), 3, 280.0),
+        ]
+
+        # The rollup must agree with a full scan of the orders it summarizes
+        scanned = stream.con.execute("""
+            SELECT CAST(timestamp AS DATE), COUNT(*), SUM(price * quantity)
+            FROM streaming_orders GROUP BY 1 ORDER BY 1
+        """).fetchall()
+        assert scanned == rollup
+        stream.con.close()
+
+
+def main():
+    """Main test function"""
+    print("RetailOS streaming rollup testing\n", flush=True)
+
+    test_rollup_accumulates_across_flushes()
+    print("[OK] test_rollup_accumulates_across_flushes", flush=True)
+
+    print("[DONE] Testing completed!", flush=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())